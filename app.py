@@ -1,13 +1,21 @@
+import importlib.util
 import streamlit as st
-import sys
-import os
-from pathlib import Path
-from src.config import settings
-from src.ui.components import setup_page, render_sidebar
+from src.ui.components import setup_page, render_sidebar, market_open_cached, execution_mode_label
 
-# Add project root to path so we can import src
-project_root = Path(__file__).parent
-sys.path.append(str(project_root))
+# Static markup, built once at import rather than on every rerun
+_HERO_HTML = """
+        <div style='padding: 2rem 0; text-align: left;'>
+            <p style='color: #94a3b8; font-size: 1.2rem; margin-bottom: 0.5rem;'>Welcome back, Trader</p>
+            <h2 style='margin-top: 0;'>Your Command Center for Algorithmic Excellence</h2>
+        </div>
+    """
+
+_IMPLEMENTATION_NOTES = """
+            - **Engine**: Modular Python Architecture
+            - **Data**: Groww WebSocket Feed (Real-time)
+            - **Logic**: Pluggable Strategy Classes
+            - **Interface**: Streamlit Fragmented UI
+        """
 
 
 def main():
@@ -15,12 +23,7 @@ def main():
     render_sidebar()
 
     # Hero Section
-    st.markdown("""
-        <div style='padding: 2rem 0; text-align: left;'>
-            <p style='color: #94a3b8; font-size: 1.2rem; margin-bottom: 0.5rem;'>Welcome back, Trader</p>
-            <h2 style='margin-top: 0;'>Your Command Center for Algorithmic Excellence</h2>
-        </div>
-    """, unsafe_allow_html=True)
+    st.markdown(_HERO_HTML, unsafe_allow_html=True)
 
     # Action Cards
     col1, col2 = st.columns(2)
@@ -47,11 +50,12 @@ def main():
     c1, c2, c3 = st.columns(3)
     
     # 1. API Status
+    from src.config import settings
     try:
-        from src.api.groww_client import GrowwClient
-        from src.config import settings
+        # Probe for the SDK without importing it (importing src.api would authenticate)
+        sdk_available = importlib.util.find_spec("growwapi") is not None
         
-        if settings.api_key and settings.api_secret:
+        if sdk_available and settings.api_key and settings.api_secret:
             c1.success("**Groww API**\n\nConnected ✅")
         else:
             c1.error("**Groww API**\n\nDisconnected ❌")
@@ -59,24 +63,18 @@ def main():
         c1.warning("**Groww API**\n\nStatus Unknown ⚠️")
 
     # 2. Market Status
-    from src.utils import is_market_open
-    if is_market_open():
+    if market_open_cached():
         c2.success("**Market Status**\n\nOPEN 🟢")
     else:
         c2.info("**Market Status**\n\nCLOSED 🔴")
 
     # 3. Mode
-    c3.info(f"**Execution Mode**\n\n{settings.mode.upper()} 🛠️")
+    c3.info(execution_mode_label())
 
     st.markdown("---")
     
     with st.expander("📝 Implementation Notes"):
-        st.markdown("""
-            - **Engine**: Modular Python Architecture
-            - **Data**: Groww WebSocket Feed (Real-time)
-            - **Logic**: Pluggable Strategy Classes
-            - **Interface**: Streamlit Fragmented UI
-        """)
+        st.markdown(_IMPLEMENTATION_NOTES)
 
 if __name__ == "__main__":
     main()
@@ -5,17 +5,13 @@ Run backtesting with configurable parameters.
 """
 
 import argparse
+import csv
 import sys
 import logging
-from pathlib import Path
 
-# Add src to path
-sys.path.insert(0, str(Path(__file__).parent))
 
-from src.config import settings
-
-
-def main():
+def build_parser() -> argparse.ArgumentParser:
+    """Build the CLI parser (stdlib only, so --help never loads project modules)."""
     parser = argparse.ArgumentParser(
         description="Run trading strategy backtest"
     )
@@ -67,10 +63,14 @@ def main():
         help="Enable debug mode (shows API calls)"
     )
     
-    args = parser.parse_args()
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
     
     # Setup logging BEFORE importing other modules
-    from src.utils.logger import setup_logger
+    from src.utils.logger import setup_logger, CachedTimeFormatter
     
     # Determine log level
     if args.debug:
@@ -91,11 +91,11 @@ def main():
         if not mod_logger.handlers:
             handler = logging.StreamHandler(sys.stdout)
             handler.setLevel(log_level)
-            handler.setFormatter(logging.Formatter("%(asctime)s | %(levelname)-8s | %(message)s", datefmt="%H:%M:%S"))
+            handler.setFormatter(CachedTimeFormatter("%(asctime)s | %(levelname)-8s | %(message)s", datefmt="%H:%M:%S"))
             mod_logger.addHandler(handler)
     
     # Now import the rest
-    from src.engine import run_backtest
+    from src.engine import run_backtest, TRADE_COLUMNS
     from src.strategies import BullCallSpreadStrategy
     
     logger.info("=" * 70)
@@ -114,9 +114,12 @@ def main():
     )
     
     # Save results
-    if result.trades:
-        df = result.to_dataframe()
-        df.to_csv(args.output, index=False)
+    if result.total_trades:
+        # Stream rows straight to disk; no intermediate DataFrame needed
+        with open(args.output, "w", newline="", buffering=1 << 20) as f:
+            writer = csv.writer(f)
+            writer.writerow(TRADE_COLUMNS)
+            writer.writerows(result.iter_trade_rows())
         logger.info(f"📁 Results saved to {args.output}")
     else:
         logger.warning("⚠️  No trades executed - no results saved")
@@ -6,18 +6,27 @@ Start the trading bot in paper or live mode.
 
 import argparse
 import sys
-from pathlib import Path
+import threading
 
-# Add src to path
-sys.path.insert(0, str(Path(__file__).parent))
 
-from src.engine import start_trading
-from src.strategies import BullCallSpreadStrategy
-from src.utils import setup_logger, is_market_open, get_next_market_open
-from src.config import settings
+def _preload_engine() -> None:
+    """
+    Import the engine's heavy third-party dependencies so they are warm by
+    the time it is needed.
+    
+    Project modules are left alone: importing them logs in to the broker
+    (TOTP) and logs, which must not happen behind the confirmation prompt.
+    """
+    try:
+        import numpy  # noqa: F401
+        import pandas  # noqa: F401
+    except Exception:
+        # The real import in main() will surface the error
+        pass
 
 
-def main():
+def build_parser() -> argparse.ArgumentParser:
+    """Build the CLI parser (stdlib only, so --help never loads project modules)."""
     parser = argparse.ArgumentParser(
         description="Run live trading bot"
     )
@@ -49,7 +58,21 @@ def main():
         help="Test configuration without starting trader"
     )
     
-    args = parser.parse_args()
+    parser.add_argument(
+        "--yes", "-y",
+        action="store_true",
+        help="Skip the live-mode confirmation prompt (for non-interactive runs)"
+    )
+    
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    
+    # Import project modules only once arguments are parsed (keeps --help fast)
+    from src.utils import setup_logger, is_market_open, get_next_market_open
+    from src.config import settings
     
     # Setup logging
     import logging
@@ -64,10 +87,14 @@ def main():
     mode = args.mode.upper()
     if mode == "LIVE":
         logger.warning("⚠️  LIVE TRADING MODE - Real money at risk!")
-        confirm = input("Type 'YES' to confirm: ")
-        if confirm != "YES":
-            logger.info("Aborted.")
-            return 1
+        if not args.yes:
+            # Load the engine's dependencies in the background while waiting for the operator
+            if not args.dry_run:
+                threading.Thread(target=_preload_engine, name="EnginePreload", daemon=True).start()
+            confirm = input("Type 'YES' to confirm: ")
+            if confirm != "YES":
+                logger.info("Aborted.")
+                return 1
     
     logger.info(f"Mode: {mode}")
     logger.info(f"Underlying: {settings.underlying}")
@@ -87,6 +114,9 @@ def main():
         logger.info("Dry run completed successfully")
         return 0
     
+    from src.engine import start_trading
+    from src.strategies import BullCallSpreadStrategy
+    
     # Create strategy
     strategy = BullCallSpreadStrategy(
         spread_width=args.spread_width or settings.spread_width
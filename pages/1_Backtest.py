@@ -1,32 +1,72 @@
 import streamlit as st
 import pandas as pd
-import sys
-from pathlib import Path
-from datetime import datetime, timedelta
-import io
+from datetime import date, timedelta
+from typing import Tuple
 import logging
 
-# Add project root to path
-project_root = Path(__file__).parent.parent
-sys.path.append(str(project_root))
-
 from src.ui.components import setup_page, render_sidebar, plot_equity_curve, plot_pnl_distribution
 from src.engine.backtester import run_backtest
-from src.utils import format_currency
+from src.strategies import BullCallSpreadStrategy
+from src.config import settings
+from src.utils import format_currency, RingBufferHandler, CachedTimeFormatter
+
+
+# Journal formatting is applied client-side by the grid (no pandas Styler pass)
+_PRICE_FORMAT = st.column_config.NumberColumn(format="%.2f")
+JOURNAL_COLUMN_CONFIG = {
+    'pnl': st.column_config.NumberColumn(format="₹%.2f"),
+    'entry_buy': _PRICE_FORMAT,
+    'entry_sell': _PRICE_FORMAT,
+    'exit_buy': _PRICE_FORMAT,
+    'exit_sell': _PRICE_FORMAT,
+}
 
+@st.cache_resource
+def get_backtest_log_handler() -> RingBufferHandler:
+    """Attach a single log capture handler that persists across reruns."""
+    handler = RingBufferHandler(capacity=5000)
+    handler.setLevel(logging.INFO)
+    formatter = CachedTimeFormatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    handler.setFormatter(formatter)
+    
+    root_logger = logging.getLogger()
+    if handler not in root_logger.handlers:
+        root_logger.addHandler(handler)
+    
+    return handler
 
-# Setup Logging Capture
-log_capture_string = io.StringIO()
-ch = logging.StreamHandler(log_capture_string)
-ch.setLevel(logging.INFO)
-formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-ch.setFormatter(formatter)
+@st.cache_data(max_entries=2, show_spinner=False)
+def default_date_range(today: date) -> Tuple[date, date]:
+    """Default analysis window (last 30 days), computed once per calendar day."""
+    return today - timedelta(days=30), today
 
-# Attach to root logger
-root_logger = logging.getLogger()
-root_logger.addHandler(ch)
+@st.cache_data(ttl=3600, show_spinner=False)
+def cached_backtest(
+    underlying: str,
+    from_date: str,
+    to_date: str,
+    use_calculated_expiries: bool,
+    spread_width: int
+) -> pd.DataFrame:
+    """
+    Run a backtest and cache the trade journal keyed on its inputs.
+    
+    The body only runs on a cache miss, so it also starts a fresh log and
+    flags the run as new; on a hit the previous run's logs stay on screen.
+    """
+    get_backtest_log_handler().clear()
+    st.session_state.backtest_ran = True
+    result = run_backtest(
+        underlying=underlying,
+        from_date=from_date,
+        to_date=to_date,
+        strategy=BullCallSpreadStrategy(spread_width=spread_width),
+        use_calculated_expiries=use_calculated_expiries
+    )
+    return result.to_dataframe()
 
 def main():
+    log_handler = get_backtest_log_handler()
     setup_page("Backtest", "🧪")
     render_sidebar()
     
@@ -41,12 +81,17 @@ def main():
                 capital = st.number_input("Starting Capital (₹)", value=100000.0, step=10000.0)
                 
             with col2:
-                # Default to last 30 days
-                default_start = datetime.now() - timedelta(days=30)
-                default_end = datetime.now()
+                # Default to last 30 days (stable for the whole day)
+                default_start, default_end = default_date_range(date.today())
                 
-                start_date = st.date_input("Analysis Start Date", value=default_start)
-                end_date = st.date_input("Analysis End Date", value=default_end)
+                start_date = st.date_input(
+                    "Analysis Start Date",
+                    value=st.session_state.setdefault('start_date', default_start)
+                )
+                end_date = st.date_input(
+                    "Analysis End Date",
+                    value=st.session_state.setdefault('end_date', default_end)
+                )
                 
             # Strategy and Options
             c3, c4 = st.columns(2)
@@ -61,29 +106,31 @@ def main():
     if submitted:
         st.divider()
         
-        # Clear previous logs
-        log_capture_string.truncate(0)
-        log_capture_string.seek(0)
+        # Convert dates to string format required by backtester
+        from_str = start_date.strftime("%Y-%m-%d")
+        to_str = end_date.strftime("%Y-%m-%d")
+        
+        # Set by cached_backtest only when it actually runs (a cache miss)
+        st.session_state.backtest_ran = False
         
         with st.status("🔬 Performing Quantitative Analysis...", expanded=True) as status:
             try:
-                # Convert dates to string format required by backtester
-                from_str = start_date.strftime("%Y-%m-%d")
-                to_str = end_date.strftime("%Y-%m-%d")
-                
                 st.write(f"📡 Fetching historical OHLCV for {underlying}...")
                 
-                # Run Backtest
-                result_obj = run_backtest(
-                    underlying=underlying,
-                    from_date=from_str,
-                    to_date=to_str,
-                    use_calculated_expiries=use_calc_expiries
+                # Run Backtest (cache_data hands back a fresh copy on every hit)
+                df_results = cached_backtest(
+                    underlying,
+                    from_str,
+                    to_str,
+                    use_calc_expiries,
+                    settings.spread_width
                 )
-                df_results = result_obj.to_dataframe()
                 
                 status.update(label="✅ Analysis Complete!", state="complete", expanded=False)
                 
+                if not st.session_state.backtest_ran:
+                    st.info("Identical parameters — showing cached run.")
+                
                 if df_results.empty:
                     st.warning("No trades generated for the selected parameters.")
                 else:
@@ -95,10 +142,15 @@ def main():
                     # Performance Metrics Dashboard
                     st.markdown("### 📊 Performance Metrics")
                     
-                    total_pnl = df_results['pnl'].sum()
-                    win_rate = (len(df_results[df_results['pnl'] > 0]) / len(df_results)) * 100
-                    max_loss = df_results['pnl'].min()
-                    profit_factor = abs(df_results[df_results['pnl'] > 0]['pnl'].sum() / df_results[df_results['pnl'] < 0]['pnl'].sum()) if not df_results[df_results['pnl'] < 0].empty else 0
+                    pnl = df_results['pnl'].to_numpy(dtype=float)
+                    wins = pnl > 0
+                    gross_profit = pnl[wins].sum()
+                    gross_loss = -pnl[pnl < 0].sum()
+                    
+                    total_pnl = pnl.sum()
+                    win_rate = wins.mean() * 100
+                    max_loss = pnl.min()
+                    profit_factor = gross_profit / gross_loss if gross_loss else 0
                     
                     m1, m2, m3, m4 = st.columns(4)
                     m1.metric("Net Cumulative P&L", format_currency(total_pnl), delta=f"{total_pnl:,.2f}")
@@ -117,11 +169,12 @@ def main():
                         plot_pnl_distribution(df_results)
                         
                     with tab3:
-                        st.dataframe(df_results.style.format({
-                            'pnl': '₹{:.2f}',
-                            'entry_price': '{:.2f}',
-                            'exit_price': '{:.2f}'
-                        }), use_container_width=True)
+                        st.dataframe(
+                            df_results,
+                            column_config=JOURNAL_COLUMN_CONFIG,
+                            use_container_width=True,
+                            height=500
+                        )
                     
             except Exception as e:
                 st.error(f"An error occurred during backtest: {str(e)}")
@@ -130,7 +183,7 @@ def main():
             finally:
                 # Show Logs
                 with st.expander("View Execution Logs"):
-                    st.code(log_capture_string.getvalue())
+                    st.code(log_handler.get_text())
 
 if __name__ == "__main__":
     main()
@@ -1,53 +1,121 @@
 import streamlit as st
-import sys
 import time
-from pathlib import Path
 import logging
-import io
 
-# Add project root to path
-project_root = Path(__file__).parent.parent
-sys.path.append(str(project_root))
-
-from src.ui.components import setup_page, render_sidebar
+from src.ui.components import setup_page, render_sidebar, market_open_cached, next_market_open_cached
 from src.engine.live_trader import LiveTrader
 from src.execution.position_manager import position_manager
-from src.utils import is_market_open, get_next_market_open, format_currency
+from src.utils import format_currency, RingBufferHandler, CachedTimeFormatter
 
 @st.cache_resource
-def setup_log_capture():
+def setup_log_capture() -> RingBufferHandler:
     """Setup logging capture that persists across reruns."""
-    capture_string = io.StringIO()
-    ch = logging.StreamHandler(capture_string)
-    ch.setLevel(logging.INFO)
-    formatter = logging.Formatter('%(asctime)s - %(message)s')
-    ch.setFormatter(formatter)
+    handler = RingBufferHandler(capacity=400)
+    handler.setLevel(logging.INFO)
+    formatter = CachedTimeFormatter('%(asctime)s - %(message)s')
+    handler.setFormatter(formatter)
     
     root_logger = logging.getLogger()
     # Avoid adding duplicate handlers on reload
-    if not any(isinstance(h, logging.StreamHandler) and h.stream == capture_string for h in root_logger.handlers):
-        root_logger.addHandler(ch)
+    if handler not in root_logger.handlers:
+        root_logger.addHandler(handler)
         
-    return capture_string
+    return handler
+
+log_handler = setup_log_capture()
+
+
+# Static markup, built once at import rather than on every rerun
+_MARKET_OPEN_BADGE = """
+            <div style='background: rgba(0, 204, 150, 0.1); padding: 0.5rem 1rem; border-radius: 8px; border: 1px solid rgba(0, 204, 150, 0.2);'>
+                <span style='color: #00CC96; font-weight: 600;'>🟢 Market is OPEN</span>
+            </div>
+        """
+
+_MARKET_CLOSED_TPL = """
+            <div style='background: rgba(239, 85, 59, 0.1); padding: 0.5rem 1rem; border-radius: 8px; border: 1px solid rgba(239, 85, 59, 0.2);'>
+                <span style='color: #EF553B; font-weight: 600;'>🔴 Market is CLOSED. Next Open: {next_open}</span>
+            </div>
+        """
+
+_STANDBY_HTML = """
+            <div style='text-align: center; padding: 4rem 1rem; background: rgba(30, 41, 59, 0.2); border-radius: 12px; border: 1px dashed rgba(255, 255, 255, 0.1);'>
+                <h3 style='color: #475569;'>Terminal Standby</h3>
+                <p style='color: #64748b;'>Select symbol and start engine to begin live monitoring.</p>
+            </div>
+        """
+
+_ENGINE_CONTROL_LABEL = "<p style='margin:0; font-size: 0.8rem; color: #94a3b8;'>ENGINE CONTROL</p>"
+
+POSITION_CARD_TEMPLATE = """
+        <div style='background: rgba(30, 41, 59, 0.4); padding: 1rem; border-radius: 12px; border: 1px solid rgba(0, 204, 150, 0.2); margin-bottom: 1rem;'>
+            <div style='display: flex; justify-content: space-between; align-items: center;'>
+                <h4 style='margin: 0; color: #00CC96;'>{strategy_name}</h4>
+                <span style='font-size: 0.8rem; color: #94a3b8;'>{spread_id}</span>
+            </div>
+            <div style='display: grid; grid-template-columns: 1fr 1fr 1fr; gap: 1rem; margin-top: 1rem;'>
+                <div>
+                    <p style='margin:0; font-size: 0.7rem; color: #64748b;'>LONG LEG</p>
+                    <p style='margin:0; font-weight: 600;'>{long_symbol}</p>
+                    <p style='margin:0; color: #94a3b8;'>{long_price:.2f} → {current_long_price:.2f}</p>
+                </div>
+                <div>
+                    <p style='margin:0; font-size: 0.7rem; color: #64748b;'>SHORT LEG</p>
+                    <p style='margin:0; font-weight: 600;'>{short_symbol}</p>
+                    <p style='margin:0; color: #94a3b8;'>{short_price:.2f} → {current_short_price:.2f}</p>
+                </div>
+                <div style='text-align: right;'>
+                    <p style='margin:0; font-size: 0.7rem; color: #64748b;'>LEG MTM</p>
+                    <p style='margin:0; font-weight: 700; color: {mtm_color};'>{mtm:+.2f}</p>
+                </div>
+            </div>
+        </div>
+    """
+
+
+def _render_position_card(pos) -> str:
+    """Fill the card template for a single open spread."""
+    mtm = pos.mtm
+    return POSITION_CARD_TEMPLATE.format_map({
+        "strategy_name": pos.strategy_name,
+        "spread_id": pos.spread_id,
+        "long_symbol": pos.long_symbol,
+        "long_price": pos.long_price,
+        "current_long_price": pos.current_long_price,
+        "short_symbol": pos.short_symbol,
+        "short_price": pos.short_price,
+        "current_short_price": pos.current_short_price,
+        "mtm": mtm,
+        "mtm_color": "#00CC96" if mtm >= 0 else "#EF553B",
+    })
 
-log_capture_string = setup_log_capture()
 
 @st.fragment(run_every=1)
 def render_live_dashboard():
-    """Render the live dashboard with 1s auto-refresh."""
+    """Render the live dashboard with 1s auto-refresh (read-only view of the trader)."""
     try:
         if 'trader' not in st.session_state or not st.session_state.trader:
             return
 
         trader = st.session_state.trader
         
-        # Execute one trading step
-        trader.check_trading_window()
+        # Trading runs on the trader's own thread; the fragment only reads state
+        if trader.ready:
+            loop_state = trader.ui_snapshot()
+            if loop_state.get("last_check"):
+                spot = loop_state.get("spot_price")
+                st.caption(
+                    f"Last check {loop_state['last_check']:%H:%M:%S}"
+                    + (f" · Spot {spot:,.2f}" if spot else "")
+                )
+        else:
+            st.caption("⏳ Connecting to market data stream...")
         
         # 1. P&L Overview
-        open_positions = position_manager.get_open_positions()
-        total_mtm = sum(p.mtm for p in open_positions)
-        realized_pnl = position_manager.get_total_realized_pnl()
+        book = position_manager.snapshot()
+        open_positions = book.positions
+        total_mtm = book.total_mtm
+        realized_pnl = book.realized_pnl
         
         m1, m2, m3 = st.columns(3)
         m1.metric("Live MTM", format_currency(total_mtm), delta=f"{total_mtm:.2f}")
@@ -56,104 +124,85 @@ def render_live_dashboard():
 
         st.markdown("---")
 
-        # 2. Position Details
+        # 2. Position Details (HTML rebuilt only when the book changes)
+        snapshot = (
+            round(total_mtm, 2),
+            round(realized_pnl, 2),
+            len(open_positions),
+            trader.state_version,
+            book.version,
+            tuple((p.current_long_price, p.current_short_price) for p in open_positions),
+        )
+        if st.session_state.get("last_snapshot") != snapshot:
+            st.session_state.last_snapshot = snapshot
+            st.session_state.positions_html = "".join(
+                _render_position_card(pos) for pos in open_positions
+            )
+
         if open_positions:
             st.markdown("### 🎯 Active Positions")
-            for pos in open_positions:
-                st.markdown(f"""
-                    <div style='background: rgba(30, 41, 59, 0.4); padding: 1rem; border-radius: 12px; border: 1px solid rgba(0, 204, 150, 0.2); margin-bottom: 1rem;'>
-                        <div style='display: flex; justify-content: space-between; align-items: center;'>
-                            <h4 style='margin: 0; color: #00CC96;'>{pos.strategy_name}</h4>
-                            <span style='font-size: 0.8rem; color: #94a3b8;'>{pos.spread_id}</span>
-                        </div>
-                        <div style='display: grid; grid-template-columns: 1fr 1fr 1fr; gap: 1rem; margin-top: 1rem;'>
-                            <div>
-                                <p style='margin:0; font-size: 0.7rem; color: #64748b;'>LONG LEG</p>
-                                <p style='margin:0; font-weight: 600;'>{pos.long_symbol}</p>
-                                <p style='margin:0; color: #94a3b8;'>{pos.long_price:.2f} → {pos.current_long_price:.2f}</p>
-                            </div>
-                            <div>
-                                <p style='margin:0; font-size: 0.7rem; color: #64748b;'>SHORT LEG</p>
-                                <p style='margin:0; font-weight: 600;'>{pos.short_symbol}</p>
-                                <p style='margin:0; color: #94a3b8;'>{pos.short_price:.2f} → {pos.current_short_price:.2f}</p>
-                            </div>
-                            <div style='text-align: right;'>
-                                <p style='margin:0; font-size: 0.7rem; color: #64748b;'>LEG MTM</p>
-                                <p style='margin:0; font-weight: 700; color: {"#00CC96" if pos.mtm >= 0 else "#EF553B"};'>{pos.mtm:+.2f}</p>
-                            </div>
-                        </div>
-                    </div>
-                """, unsafe_allow_html=True)
+            st.markdown(st.session_state.positions_html, unsafe_allow_html=True)
         else:
             st.info("Searching for entry signal...")
             
         # 3. Logs
         with st.expander("🔍 Terminal Logs"):
-            st.code(log_capture_string.getvalue()[-2000:], language="text")
+            st.code(log_handler.get_text(), language="text")
         
     except Exception as e:
         st.error(f"Dashboard Error: {e}")
 
-def main():
-    setup_page("Live Terminal", "⚡")
-    render_sidebar()
+def _toggle_engine():
+    """Start/Stop callback; runs before the fragment re-renders, so no explicit rerun is needed."""
+    st.session_state.trading_active = not st.session_state.trading_active
     
-    # Check Market Status
-    if is_market_open():
-        st.markdown("""
-            <div style='background: rgba(0, 204, 150, 0.1); padding: 0.5rem 1rem; border-radius: 8px; border: 1px solid rgba(0, 204, 150, 0.2);'>
-                <span style='color: #00CC96; font-weight: 600;'>🟢 Market is OPEN</span>
-            </div>
-        """, unsafe_allow_html=True)
+    if st.session_state.trading_active:
+        underlying = st.session_state.live_underlying
+        trader = LiveTrader(
+            underlying=underlying,
+            mode=st.session_state.live_mode.upper()
+        )
+        # Returns at once; connecting happens on the trader's own thread and
+        # a STOP clicked before it finishes cancels the start
+        trader.start(block=False)
+        st.session_state.trader = trader
+        st.session_state.engine_toast = f"Strategic Deployment: {underlying}"
     else:
-        next_open = get_next_market_open()
-        st.markdown(f"""
-            <div style='background: rgba(239, 85, 59, 0.1); padding: 0.5rem 1rem; border-radius: 8px; border: 1px solid rgba(239, 85, 59, 0.2);'>
-                <span style='color: #EF553B; font-weight: 600;'>🔴 Market is CLOSED. Next Open: {next_open}</span>
-            </div>
-        """, unsafe_allow_html=True)
+        if st.session_state.trader:
+            st.session_state.trader.stop()
+        st.session_state.trader = None
+        st.session_state.engine_toast = "Deployment Terminated"
+
+
+@st.fragment
+def render_engine_panel():
+    """Engine controls and dashboard; interacting here reruns only this fragment."""
+    # Read on every fragment rerun, not captured from the last full run
+    market_open = market_open_cached()
     
-    st.markdown("<br>", unsafe_allow_html=True)
+    # Callbacks can't draw during a fragment rerun; show their toast here
+    toast = st.session_state.pop("engine_toast", None)
+    if toast:
+        st.toast(toast)
     
-    # Initialize Session State
-    if 'trading_active' not in st.session_state:
-        st.session_state.trading_active = False
-    if 'trader' not in st.session_state:
-        st.session_state.trader = None
-        
     # Controls in a nice container
     with st.container():
         c1, c2, c3 = st.columns([1, 1, 1])
         with c1:
-            mode = st.radio("Mode", ["Paper", "Live"], horizontal=True)
+            st.radio("Mode", ["Paper", "Live"], horizontal=True, key="live_mode")
         with c2:
-            underlying = st.selectbox("Symbol", ["NIFTY", "BANKNIFTY"])
+            st.selectbox("Symbol", ["NIFTY", "BANKNIFTY"], key="live_underlying")
         with c3:
-            st.markdown("<p style='margin:0; font-size: 0.8rem; color: #94a3b8;'>ENGINE CONTROL</p>", unsafe_allow_html=True)
+            st.markdown(_ENGINE_CONTROL_LABEL, unsafe_allow_html=True)
             # Disable start button if market is closed (regardless of mode)
-            disable_start = not is_market_open()
+            disable_start = not market_open
             
-            if st.button(
+            st.button(
                 "🏁 START ENGINE" if not st.session_state.trading_active else "🛑 STOP ENGINE",
                 disabled=disable_start and not st.session_state.trading_active,
-                use_container_width=True
-            ):
-                st.session_state.trading_active = not st.session_state.trading_active
-                
-                if st.session_state.trading_active:
-                    st.session_state.trader = LiveTrader(
-                        underlying=underlying,
-                        mode=mode.upper()
-                    )
-                    st.session_state.trader.start()
-                    st.toast(f"Strategic Deployment: {underlying}")
-                else:
-                    if st.session_state.trader:
-                        st.session_state.trader.stop()
-                    st.session_state.trader = None
-                    st.toast("Deployment Terminated")
-                
-                st.rerun()
+                use_container_width=True,
+                on_click=_toggle_engine
+            )
 
     if disable_start and not st.session_state.trading_active:
          st.warning("Live deployment restricted: Market is Currently Closed.")
@@ -164,14 +213,31 @@ def main():
     if st.session_state.trading_active and st.session_state.trader:
         render_live_dashboard()
     else:
-        st.markdown("""
-            <div style='text-align: center; padding: 4rem 1rem; background: rgba(30, 41, 59, 0.2); border-radius: 12px; border: 1px dashed rgba(255, 255, 255, 0.1);'>
-                <h3 style='color: #475569;'>Terminal Standby</h3>
-                <p style='color: #64748b;'>Select symbol and start engine to begin live monitoring.</p>
-            </div>
-        """, unsafe_allow_html=True)
+        st.markdown(_STANDBY_HTML, unsafe_allow_html=True)
         with st.expander("Previous Session Logs"):
-            st.code(log_capture_string.getvalue()[-2000:], language="text")
+            st.code(log_handler.get_text(), language="text")
+
+def main():
+    setup_page("Live Terminal", "⚡")
+    render_sidebar()
+    
+    # Check Market Status
+    market_open = market_open_cached()
+    if market_open:
+        st.markdown(_MARKET_OPEN_BADGE, unsafe_allow_html=True)
+    else:
+        next_open = next_market_open_cached()
+        st.markdown(_MARKET_CLOSED_TPL.format(next_open=next_open), unsafe_allow_html=True)
+    
+    st.markdown("<br>", unsafe_allow_html=True)
+    
+    # Initialize Session State
+    if 'trading_active' not in st.session_state:
+        st.session_state.trading_active = False
+    if 'trader' not in st.session_state:
+        st.session_state.trader = None
+    
+    render_engine_panel()
 
 if __name__ == "__main__":
     main()
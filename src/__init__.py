@@ -1 +1,30 @@
 # Trading Bot Source Package
+
+import importlib
+
+# Lazily resolved top-level names (PEP 562): attribute -> submodule
+_LAZY_ATTRS = {
+    "settings": ".config",
+    "Settings": ".config",
+    "run_backtest": ".engine",
+    "Backtester": ".engine",
+    "BacktestResult": ".engine",
+    "LiveTrader": ".engine",
+    "start_trading": ".engine",
+    "BaseStrategy": ".strategies",
+    "BullCallSpreadStrategy": ".strategies",
+}
+
+
+def __getattr__(name: str):
+    """Import the owning submodule on first access to a lazy attribute."""
+    module_name = _LAZY_ATTRS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_LAZY_ATTRS))
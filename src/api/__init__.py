@@ -1,4 +1,28 @@
-from .groww_client import GrowwClient, client
-from .stream import StreamManager, stream_manager
+import importlib
 
-__all__ = ["GrowwClient", "client", "StreamManager", "stream_manager"]
+# Resolved lazily (PEP 562): importing the package must not authenticate;
+# the global client logs in when groww_client is first imported
+_LAZY_ATTRS = {
+    "TokenBucket": ".rate_limiter",
+    "GrowwClient": ".groww_client",
+    "client": ".groww_client",
+    "LTPBatcher": ".ltp_batcher",
+    "ltp_batcher": ".ltp_batcher",
+    "StreamManager": ".stream",
+    "stream_manager": ".stream",
+}
+
+__all__ = list(_LAZY_ATTRS)
+
+
+def __getattr__(name: str):
+    module_name = _LAZY_ATTRS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_LAZY_ATTRS))
@@ -4,21 +4,137 @@ Handles authentication, connection management, and error handling.
 """
 
 import logging
-from typing import Optional, Dict, Any, List
-import pyotp
+import threading
+import time
+import uuid
+from functools import lru_cache
+from typing import TYPE_CHECKING, Optional, Dict, Any, List
+import requests
+from requests.adapters import HTTPAdapter
 from growwapi import GrowwAPI
+from growwapi.groww.exceptions import (
+    GrowwAPINotFoundException,
+    GrowwAPIRateLimitException,
+    GrowwAPITimeoutException,
+)
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+from urllib3.exceptions import NewConnectionError
+
+try:
+    # Optional C-accelerated JSON decoder for REST payloads
+    import orjson
+except ImportError:
+    orjson = None
 
 from ..config import settings
+from .rate_limiter import TokenBucket
+
+if TYPE_CHECKING:
+    import pyotp
 
 LOG = logging.getLogger(__name__)
 
+# Only network-level failures are retried; auth errors, bad symbols and other
+# API rejections surface immediately instead of stalling callers in backoff
+TRANSIENT_ERRORS = (
+    ConnectionError,
+    TimeoutError,
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+    GrowwAPITimeoutException,
+    GrowwAPIRateLimitException,
+)
+
+
+def _order_not_sent(error: BaseException) -> bool:
+    """
+    True if an order request failed before it reached the broker.
+    
+    Only connection setup failures qualify: once bytes are on the wire a
+    timeout or reset says nothing about whether the order was accepted.
+    """
+    # _attach_session re-raises requests timeouts as GrowwAPITimeoutException
+    cause = error.__cause__ or error
+    if isinstance(cause, requests.exceptions.ConnectTimeout):
+        return True
+    if isinstance(cause, requests.exceptions.ConnectionError) and cause.args:
+        return isinstance(getattr(cause.args[0], "reason", None), NewConnectionError)
+    return False
+
+
+@lru_cache(maxsize=1)
+def _totp_generator() -> "pyotp.TOTP":
+    """TOTP generator for the configured secret (settings are immutable)."""
+    # Only needed to authenticate, so not imported with the module
+    import pyotp
+    return pyotp.TOTP(settings.api_secret)
+
+
+# Keep-alive connections kept per host. Sized for the async fetchers, which
+# fan requests out over asyncio's default thread pool (at most 32 workers)
+HTTP_POOL_SIZE = 32
+
+
+def _create_http_session() -> requests.Session:
+    """Keep-alive HTTPS session shared by all REST calls (retries happen in retry_transient)."""
+    session = requests.Session()
+    session.mount(
+        "https://",
+        HTTPAdapter(pool_connections=2, pool_maxsize=HTTP_POOL_SIZE, max_retries=0)
+    )
+    return session
+
+
+def _attach_session(api: GrowwAPI, session: requests.Session) -> None:
+    """
+    Route the SDK's REST helpers through a pooled session.
+    
+    The SDK calls module-level requests.get/post/put, which opens a fresh
+    TCP+TLS connection per call. Its _request_* helpers are replaced on this
+    instance only; timeouts are still mapped to GrowwAPITimeoutException.
+    With orjson installed, the responses' .json() decodes with it.
+    """
+    for verb in ("get", "post", "put"):
+        name = f"_request_{verb}"
+        if not hasattr(api, name):
+            LOG.debug(f"GrowwAPI has no {name}; leaving its HTTP handling alone")
+            continue
+        
+        def send(*args, _send=getattr(session, verb), **kwargs):
+            try:
+                response = _send(*args, **kwargs)
+            except requests.Timeout as e:
+                raise GrowwAPITimeoutException() from e
+            if orjson is not None:
+                response.json = lambda **_: orjson.loads(response.content)
+            return response
+        
+        setattr(api, name, send)
+
+
+retry_transient = retry(
+    stop=stop_after_attempt(3),
+    wait=wait_exponential(multiplier=1, min=2, max=10),
+    retry=retry_if_exception_type(TRANSIENT_ERRORS),
+    reraise=True
+)
+
 
 class GrowwClient:
     """Singleton wrapper for Groww API client with automatic authentication."""
     
     _instance: Optional["GrowwClient"] = None
     _api: Optional[GrowwAPI] = None
+    _init_lock = threading.Lock()
+    _http_session = _create_http_session()
+    _refresh_lock = threading.Lock()
+    _last_refresh: float = 0.0
+    
+    # Refresh requests closer together than this reuse the fresh token
+    REFRESH_MIN_INTERVAL = 30.0
+    
+    # Attempts for an order that provably never left this machine
+    ORDER_ATTEMPTS = 3
     
     # Exchange and segment constants
     EXCHANGE_NSE = "NSE"
@@ -26,21 +142,30 @@ class GrowwClient:
     SEGMENT_CASH = "CASH"
     SEGMENT_FNO = "FNO"
     
+    # Client-side throttles (requests/second), one per Groww rate-limit category
+    _live_data_bucket = TokenBucket(rate=10)
+    _non_trading_bucket = TokenBucket(rate=20)
+    _order_bucket = TokenBucket(rate=10)
+    
     def __new__(cls) -> "GrowwClient":
-        if cls._instance is None:
-            cls._instance = super().__new__(cls)
+        with cls._init_lock:
+            if cls._instance is None:
+                cls._instance = super().__new__(cls)
         return cls._instance
     
     def __init__(self):
-        if self._api is None:
-            self._api = self._create_client()
+        # Serialized so concurrent first calls authenticate only once
+        with self._init_lock:
+            if self._api is None:
+                self._api = self._create_client()
     
     def _create_client(self) -> GrowwAPI:
         """Initialize and authenticate Groww API client."""
+        settings.validate()
+        
         try:
             # Generate TOTP for authentication
-            totp_gen = pyotp.TOTP(settings.api_secret)
-            totp = totp_gen.now()
+            totp = _totp_generator().now()
             
             # Get access token
             access_token = GrowwAPI.get_access_token(
@@ -50,6 +175,8 @@ class GrowwClient:
             
             # Initialize client
             client = GrowwAPI(access_token)
+            _attach_session(client, self._http_session)
+            self._last_refresh = time.monotonic()
             LOG.info("Groww API client initialized successfully")
             return client
             
@@ -58,13 +185,22 @@ class GrowwClient:
             raise RuntimeError(f"Groww API authentication failed: {e}") from e
     
     def refresh_token(self) -> None:
-        """Refresh the API client authentication."""
-        self._api = self._create_client()
+        """
+        Refresh the API client authentication.
+        
+        Concurrent or back-to-back calls are coalesced: callers arriving
+        within REFRESH_MIN_INTERVAL of the last refresh keep that token.
+        """
+        with self._refresh_lock:
+            if time.monotonic() - self._last_refresh < self.REFRESH_MIN_INTERVAL:
+                LOG.debug("Groww API token refreshed recently; skipping")
+                return
+            self._api = self._create_client()
         LOG.info("Groww API token refreshed")
     
     # ==================== Market Data APIs ====================
     
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10))
+    @retry_transient
     def get_ltp(self, symbols: str, segment: str = "CASH") -> Dict[str, float]:
         """
         Get last traded price for instruments.
@@ -76,6 +212,7 @@ class GrowwClient:
         Returns:
             Dictionary mapping symbol to LTP
         """
+        self._live_data_bucket.acquire()
         try:
             return self._api.get_ltp(
                 exchange_trading_symbols=symbols,
@@ -85,7 +222,7 @@ class GrowwClient:
             LOG.error(f"Failed to get LTP for {symbols}: {e}")
             raise
     
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10))
+    @retry_transient
     def get_quote(self, exchange: str, segment: str, trading_symbol: str) -> Dict[str, Any]:
         """
         Get full market quote for an instrument.
@@ -98,6 +235,7 @@ class GrowwClient:
         Returns:
             Quote data including bid/ask, OHLC, etc.
         """
+        self._live_data_bucket.acquire()
         try:
             return self._api.get_quote(
                 exchange=exchange,
@@ -110,7 +248,7 @@ class GrowwClient:
     
     # ==================== Historical Data APIs ====================
     
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10))
+    @retry_transient
     def get_historical_candles(
         self,
         groww_symbol: str,
@@ -134,6 +272,7 @@ class GrowwClient:
         Returns:
             Dictionary with candles array
         """
+        self._non_trading_bucket.acquire()
         try:
             return self._api.get_historical_candles(
                 exchange=exchange,
@@ -159,6 +298,7 @@ class GrowwClient:
         """
         Get historical candle data using legacy API (deprecated but available).
         """
+        self._non_trading_bucket.acquire()
         try:
             return self._api.get_historical_candle_data(
                 trading_symbol=trading_symbol,
@@ -174,11 +314,12 @@ class GrowwClient:
     
     # ==================== Instruments APIs ====================
     
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10))
+    @retry_transient
     def get_all_instruments(self):
         """
         Get all available instruments as a DataFrame.
         """
+        self._non_trading_bucket.acquire()
         try:
             return self._api.get_all_instruments()
         except Exception as e:
@@ -189,13 +330,14 @@ class GrowwClient:
         """
         Get instrument details by Groww symbol.
         """
+        self._non_trading_bucket.acquire()
         try:
             return self._api.get_instrument_by_groww_symbol(groww_symbol=groww_symbol)
         except Exception as e:
             LOG.error(f"Failed to get instrument {groww_symbol}: {e}")
             raise
     
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10))
+    @retry_transient
     def get_expiries(
         self,
         underlying_symbol: str,
@@ -206,6 +348,7 @@ class GrowwClient:
         """
         Get available expiry dates for derivatives.
         """
+        self._non_trading_bucket.acquire()
         try:
             kwargs = {
                 "exchange": exchange,
@@ -220,7 +363,7 @@ class GrowwClient:
             LOG.error(f"Failed to get expiries for {underlying_symbol}: {e}")
             raise
     
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10))
+    @retry_transient
     def get_contracts(
         self,
         underlying_symbol: str,
@@ -230,6 +373,7 @@ class GrowwClient:
         """
         Get available contracts for a given expiry.
         """
+        self._non_trading_bucket.acquire()
         try:
             return self._api.get_contracts(
                 exchange=exchange,
@@ -242,7 +386,6 @@ class GrowwClient:
     
     # ==================== Order APIs ====================
     
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10))
     def place_order(
         self,
         trading_symbol: str,
@@ -256,41 +399,78 @@ class GrowwClient:
     ) -> Dict[str, Any]:
         """
         Place a new order.
+        
+        Unlike the read-only calls this is not wrapped in retry_transient: a
+        timed-out order may already be live, and resending it would double
+        the position. The request is resent only when the connection was
+        never established (see _order_not_sent). Any other transient failure
+        is settled by looking the order up by its reference ID.
         """
         if settings.mode == "PAPER":
             LOG.info(f"[PAPER] Would place order: {transaction_type} {quantity} {trading_symbol}")
             return {"order_id": "PAPER_ORDER", "status": "SIMULATED"}
         
+        order_params = {
+            "trading_symbol": trading_symbol,
+            "exchange": exchange,
+            "segment": segment,
+            "transaction_type": transaction_type,
+            "quantity": quantity,
+            "order_type": order_type,
+            "product": product,
+            # One reference for every attempt, so the order can be traced
+            "order_reference_id": uuid.uuid4().hex[:20],
+        }
+        if price and order_type == "LIMIT":
+            order_params["price"] = price
+        
+        for attempt in range(1, self.ORDER_ATTEMPTS + 1):
+            self._order_bucket.acquire()
+            try:
+                return self._api.place_order(**order_params)
+            except Exception as e:
+                if attempt < self.ORDER_ATTEMPTS and _order_not_sent(e):
+                    LOG.warning(f"Order for {trading_symbol} not sent ({e}); retrying")
+                    time.sleep(2 ** attempt)
+                    continue
+                if isinstance(e, TRANSIENT_ERRORS):
+                    placed = self._find_order(segment, order_params["order_reference_id"])
+                    if placed is not None:
+                        LOG.warning(f"Order for {trading_symbol} went through despite: {e}")
+                        return placed
+                LOG.error(f"Failed to place order for {trading_symbol}: {e}")
+                raise
+    
+    def _find_order(self, segment: str, order_reference_id: str) -> Optional[Dict[str, Any]]:
+        """Status of the order with this reference ID, or None if the broker has no such order."""
+        self._non_trading_bucket.acquire()
         try:
-            order_params = {
-                "trading_symbol": trading_symbol,
-                "exchange": exchange,
-                "segment": segment,
-                "transaction_type": transaction_type,
-                "quantity": quantity,
-                "order_type": order_type,
-                "product": product
-            }
-            if price and order_type == "LIMIT":
-                order_params["price"] = price
-                
-            return self._api.place_order(**order_params)
+            return self._api.get_order_status_by_reference(
+                segment=segment, order_reference_id=order_reference_id
+            )
+        except GrowwAPINotFoundException:
+            return None
         except Exception as e:
-            LOG.error(f"Failed to place order for {trading_symbol}: {e}")
-            raise
+            LOG.error(
+                f"Could not check order {order_reference_id}: {e}; "
+                f"verify the order book before retrying"
+            )
+            return None
     
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10))
+    @retry_transient
     def get_orders(self) -> List[Dict[str, Any]]:
         """Get all orders for the day."""
+        self._non_trading_bucket.acquire()
         try:
             return self._api.get_orders()
         except Exception as e:
             LOG.error(f"Failed to get orders: {e}")
             raise
     
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10))
+    @retry_transient
     def get_positions(self) -> List[Dict[str, Any]]:
         """Get current positions."""
+        self._non_trading_bucket.acquire()
         try:
             return self._api.get_positions()
         except Exception as e:
@@ -0,0 +1,113 @@
+"""
+LTP request batching.
+Coalesces concurrent single-symbol LTP lookups into multi-symbol API calls.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, List, Optional
+
+from .groww_client import GrowwClient, client
+
+LOG = logging.getLogger(__name__)
+
+
+class LTPBatcher:
+    """
+    Collects LTP requests for a short window and resolves them with one
+    `get_ltp` call per segment.
+
+    Callers keep synchronous ergonomics:
+    `request(symbol).result(timeout=RESULT_TIMEOUT)`.
+    """
+
+    # Groww accepts at most this many symbols per LTP request
+    MAX_SYMBOLS = 50
+    # Longest a caller should block on a result (covers get_ltp's retries)
+    RESULT_TIMEOUT = 15.0
+
+    def __init__(self, api_client: GrowwClient, flush_ms: int = 50):
+        """
+        Args:
+            api_client: Client used for the batched calls
+            flush_ms: How long to gather requests before flushing
+        """
+        self._client = api_client
+        self.flush_interval = flush_ms / 1000
+        # segment -> symbol -> futures waiting on that symbol
+        self._pending: Dict[str, Dict[str, List[Future]]] = {}
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def request(self, symbol: str, segment: str = "CASH") -> Future:
+        """
+        Queue an LTP lookup.
+
+        Args:
+            symbol: Symbol in exchange_symbol format (e.g., "NSE_NIFTY")
+            segment: Market segment
+
+        Returns:
+            Future resolving to the LTP (None if the API omitted it)
+        """
+        future: Future = Future()
+        with self._cond:
+            if self._thread is None or not self._thread.is_alive():
+                if self._thread is not None:
+                    LOG.error("❌ LTP batcher thread died; restarting it")
+                self._thread = threading.Thread(
+                    target=self._run, name="LTPBatcher", daemon=True
+                )
+                self._thread.start()
+            self._pending.setdefault(segment, {}).setdefault(symbol, []).append(future)
+            self._cond.notify()
+        return future
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+
+            # Let concurrent callers join this batch
+            time.sleep(self.flush_interval)
+
+            with self._cond:
+                batch, self._pending = self._pending, {}
+
+            try:
+                for segment, waiters in batch.items():
+                    symbols = list(waiters)
+                    for i in range(0, len(symbols), self.MAX_SYMBOLS):
+                        self._flush(segment, symbols[i:i + self.MAX_SYMBOLS], waiters)
+            except Exception as e:
+                # Never leave a caller waiting on a batch that blew up
+                LOG.error(f"❌ LTP batch failed: {e}")
+                for waiters in batch.values():
+                    for futures in waiters.values():
+                        for future in futures:
+                            if not future.done():
+                                future.set_exception(e)
+
+    def _flush(self, segment: str, symbols: List[str], waiters: Dict[str, List[Future]]) -> None:
+        """Fetch one chunk of symbols and resolve their futures."""
+        try:
+            prices = self._client.get_ltp(symbols=",".join(symbols), segment=segment) or {}
+        except Exception as e:
+            for symbol in symbols:
+                for future in waiters[symbol]:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+
+        for symbol in symbols:
+            price = prices.get(symbol)
+            for future in waiters[symbol]:
+                if not future.done():
+                    future.set_result(price)
+
+
+# Global instance
+ltp_batcher = LTPBatcher(client)
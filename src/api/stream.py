@@ -6,11 +6,21 @@ Manages WebSocket connection to Groww API for real-time data.
 import logging
 import threading
 import time
-from typing import List, Dict, Callable, Optional, Set
+from typing import Any, List, Dict, Callable, Optional, Set, Tuple
+import numpy as np
 from growwapi import GrowwFeed
+from growwapi.groww.constants import FeedConstants
+
+try:
+    # Optional C-accelerated JSON decoder for raw tick frames
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
 
 from ..config import settings
 from .groww_client import client
+from ..data.instruments import instrument_manager
+from ..utils import is_market_open
 
 LOG = logging.getLogger(__name__)
 
@@ -25,171 +35,567 @@ class StreamManager:
     _feed: Optional[GrowwFeed] = None
     _is_connected: bool = False
     _subscriptions: Set[str] = set()
-    _latest_ticks: Dict[str, float] = {}
+    # symbol -> feed instrument dict, and (exchange, segment, token) -> symbol
+    _instruments: Dict[str, Dict[str, Any]] = {}
+    _feed_keys: Dict[Tuple[str, str, str], str] = {}
+    # symbol -> tick listeners, built at subscribe time for O(1) dispatch
+    _sym_callbacks: Dict[str, List[Callable[[str, float], None]]] = {}
     _lock = threading.Lock()
     
+    # Latest ticks as struct-of-arrays: symbol -> slot, one array per field.
+    # Single writer (the feed thread in _on_ticks); readers never lock.
+    INITIAL_CAPACITY = 1024
+    _idx: Dict[str, int] = {}
+    _ltp: np.ndarray = np.full(INITIAL_CAPACITY, np.nan)
+    _ts: np.ndarray = np.zeros(INITIAL_CAPACITY, dtype=np.int64)
+    
+    # Watchdog: resubscribe when ticks stop arriving during market hours, and
+    # rebuild the feed only once its NATS client has closed. That client sends
+    # its own keep-alive pings and retries dropped sockets itself, and every
+    # GrowwFeed built opens a new one that the SDK never releases.
+    STALL_TIMEOUT = 15.0
+    # Pause between dropping and re-adding topics (the SDK unsubscribes asynchronously)
+    RESUBSCRIBE_DELAY = 1.0
+    # Circuit breaker: after this many failed reconnects, back off for a while
+    MAX_RECONNECT_FAILURES = 5
+    RECONNECT_COOLDOWN = 30.0
+    _last_tick_ns: int = 0
+    # Arrival of the latest real tick (_last_tick_ns is also reset on reconnect)
+    _last_data_ns: int = 0
+    _watchdog: Optional[threading.Thread] = None
+    _watchdog_stop = threading.Event()
+    _reconnect_lock = threading.Lock()
+    _reconnect_failures: int = 0
+    _reconnect_blocked_until: float = 0.0
+    
+    # Unsubscribe requests are coalesced over this window (seconds); subscribes
+    # go out at once, together with whatever is already queued
+    SUBSCRIPTION_DEBOUNCE = 0.05
+    _pending_sub: Set[str] = set()
+    _pending_unsub: Set[str] = set()
+    _sub_lock = threading.Lock()
+    _flush_timer: Optional[threading.Timer] = None
+    
+    # Reads of subscribed symbols that have never ticked (each one means a REST fallback)
+    MISSING_TICK_ALERT_EVERY = 30
+    missing_tick_reads: int = 0
+    
     def __new__(cls) -> "StreamManager":
         if cls._instance is None:
             cls._instance = super().__new__(cls)
         return cls._instance
     
-    def __init__(self):
-        if self._feed is None:
-            self._callbacks: List[Callable] = []
-
     def connect(self) -> None:
-        """Initialize and connect WebSocket."""
+        """Open the feed connection, reusing the feed object if one exists."""
         if self._is_connected:
             LOG.info("⚠️  Stream already connected")
             return
             
         try:
-            # Get fresh access token
-            access_token = client.api.access_token
-            if not access_token:
-                LOG.error("❌ Cannot connect: No access token")
-                return
-
-            self._feed = GrowwFeed(access_token)
-            
-            # Set callbacks
-            self._feed.on_connect = self._on_connect
-            self._feed.on_close = self._on_close
-            self._feed.on_error = self._on_error
-            self._feed.on_ticks = self._on_ticks
-            
-            # Connect in a separate thread (GrowwFeed is blocking by default or manages its own loop)
-            # Adjust based on library behavior - usually client.connect() is non-blocking or we run it threaded
-            LOG.info("🌐 Connecting to Groww WebSocket...")
-            self._feed.connect()
+            if self._feed is not None and self._feed_closed(self._feed):
+                self._release_feed()
+            if self._feed is None:
+                LOG.info("🌐 Connecting to Groww feed...")
+                # The constructor opens the NATS connection and starts its consumer thread
+                self._feed = GrowwFeed(client.api)
             
             self._is_connected = True
+            self._last_tick_ns = time.monotonic_ns()
+            self._start_watchdog()
             
         except Exception as e:
             LOG.error(f"❌ Stream connection failed: {e}")
             self._is_connected = False
+            # Don't reuse a feed that failed to connect
+            self._feed = None
+    
+    def reconnect(self) -> None:
+        """Replace a dead feed with a fresh one and restore its subscriptions."""
+        LOG.info("🔄 Reconnecting to Groww feed...")
+        self._is_connected = False
+        self._release_feed()
+        self.connect()
+        
+        # A rebuilt feed starts empty; restore what was subscribed before
+        if self._is_connected and self._subscriptions:
+            resubscribe = list(self._subscriptions)
+            self._subscriptions.difference_update(resubscribe)
+            self._send_subscribe(resubscribe)
             
     def disconnect(self) -> None:
-        """Disconnect WebSocket."""
+        """
+        Stop streaming and forget every subscription and listener (full shutdown).
+        
+        A live feed is kept for the next connect(): each new GrowwFeed opens
+        a NATS connection that the SDK never closes.
+        """
+        self._watchdog_stop.set()
+        with self._sub_lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            self._pending_sub.clear()
+            self._pending_unsub.clear()
         if self._feed and self._is_connected:
             LOG.info("🔌 Disconnecting stream...")
+            self._is_connected = False
+            if self._feed_closed(self._feed):
+                self._release_feed()
+            elif self._subscriptions:
+                try:
+                    self._feed_unsubscribe(self._feed, list(self._subscriptions))
+                except Exception as e:
+                    LOG.warning(f"Error unsubscribing stream: {e}")
+        
+        # The next session subscribes from scratch
+        with self._lock:
+            self._sym_callbacks.clear()
+        self._subscriptions.clear()
+        self._feed_keys.clear()
+    
+    def _release_feed(self) -> None:
+        """Unsubscribe the current feed's topics and forget it; late ticks from it are ignored."""
+        feed, self._feed = self._feed, None
+        if feed is None:
+            return
+        if self._feed_closed(feed):
+            # Nothing left to unsubscribe; let the SDK build a fresh client next time
+            self._discard_nats_client(feed)
+            return
+        if not self._subscriptions:
+            return
+        # The SDK has no close(); without topics the old NATS connection goes quiet
+        try:
+            self._feed_unsubscribe(feed, list(self._subscriptions))
+        except Exception as e:
+            LOG.warning(f"Error releasing stream: {e}")
+    
+    @staticmethod
+    def _feed_closed(feed: GrowwFeed) -> bool:
+        """True once the feed's NATS connection has closed for good (it gave up reconnecting)."""
+        socket = getattr(getattr(feed, "_nats_client", None), "_socket", None)
+        return socket is None or socket.is_closed
+    
+    @staticmethod
+    def _discard_nats_client(feed: GrowwFeed) -> None:
+        """Drop a closed NATS client from the SDK's class-level registry and stop its loop."""
+        nats_client = getattr(feed, "_nats_client", None)
+        if nats_client is None:
+            return
+        clients = GrowwFeed._nats_clients
+        for key, cached in list(clients.items()):
+            if cached is nats_client:
+                del clients[key]
+        loop = getattr(nats_client, "_loop", None)
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(loop.stop)
+    
+    def _start_watchdog(self) -> None:
+        """Start the stall watchdog unless it is already running."""
+        watchdog = self._watchdog
+        if watchdog is not None and watchdog.is_alive():
+            if not self._watchdog_stop.is_set() or watchdog is threading.current_thread():
+                return
+            # A disconnect() is still winding the old thread down
+            watchdog.join(timeout=2.0)
+        self._watchdog_stop.clear()
+        self._watchdog = threading.Thread(
+            target=self._watchdog_loop, name="StreamWatchdog", daemon=True
+        )
+        self._watchdog.start()
+    
+    def _watchdog_loop(self) -> None:
+        """Recover from dropped or silently stalled feeds until disconnect()."""
+        while not self._watchdog_stop.wait(1.0):
+            self._check_feed()
+    
+    def _check_feed(self) -> None:
+        """One watchdog pass: rebuild a dead feed, resubscribe a stalled one."""
+        # Nothing subscribed means no ticks are expected
+        if not self._subscriptions:
+            return
+        
+        if not self._is_connected:
+            self._recover("Stream dropped")
+            return
+        
+        feed = self._feed
+        if feed is None or self._feed_closed(feed):
+            self._recover("Feed connection closed")
+            return
+        
+        if not is_market_open():
+            # Silence is expected; start a full stall window at the open
+            self._last_tick_ns = time.monotonic_ns()
+            return
+        
+        silent_s = (time.monotonic_ns() - self._last_tick_ns) / 1e9
+        if silent_s > self.STALL_TIMEOUT:
+            self._resubscribe(f"No ticks for {silent_s:.0f}s")
+    
+    def _resubscribe(self, reason: str) -> None:
+        """Re-send every subscription on the existing feed (its connection is still up)."""
+        if not self._reconnect_lock.acquire(blocking=False):
+            return
+        
+        try:
+            feed = self._feed
+            symbols = list(self._subscriptions)
+            if feed is None or not symbols:
+                return
+            LOG.warning(f"⚠️  {reason}; resubscribing {len(symbols)} symbols")
             try:
-                self._feed.close()
+                self._feed_unsubscribe(feed, symbols)
             except Exception as e:
-                LOG.warning(f"Error closing stream: {e}")
-            finally:
-                self._is_connected = False
-                self._feed = None
+                LOG.warning(f"Error dropping stalled subscriptions: {e}")
+            self._subscriptions.difference_update(symbols)
+            # Let the SDK finish unsubscribing, or it skips the topics as still subscribed
+            if self._watchdog_stop.wait(self.RESUBSCRIBE_DELAY) or feed is not self._feed:
+                return
+            self._send_subscribe(symbols)
+        finally:
+            # Give the refreshed subscriptions a full stall window
+            self._last_tick_ns = time.monotonic_ns()
+            self._reconnect_lock.release()
+    
+    def _recover(self, reason: str) -> None:
+        """Rebuild the feed, honouring the circuit-breaker cooldown."""
+        if time.monotonic() < self._reconnect_blocked_until:
+            return
+        if not self._reconnect_lock.acquire(blocking=False):
+            return
+        
+        try:
+            LOG.warning(f"⚠️  {reason}; reconnecting stream")
+            self.reconnect()
+            if self._is_connected:
+                self._reconnect_failures = 0
+                # Give the fresh connection a full stall window
+                self._last_tick_ns = time.monotonic_ns()
+                return
+            
+            self._reconnect_failures += 1
+            if self._reconnect_failures >= self.MAX_RECONNECT_FAILURES:
+                LOG.error(
+                    f"❌ {self._reconnect_failures} reconnects failed; "
+                    f"pausing for {self.RECONNECT_COOLDOWN:.0f}s"
+                )
+                self._reconnect_failures = 0
+                self._reconnect_blocked_until = time.monotonic() + self.RECONNECT_COOLDOWN
+        finally:
+            self._reconnect_lock.release()
                 
-    def subscribe(self, symbols: List[str]) -> None:
+    def subscribe(
+        self,
+        symbols: List[str],
+        callback: Optional[Callable[[str, float], None]] = None
+    ) -> None:
         """
         Subscribe to list of symbols.
+        
+        New symbols are sent upstream before this returns, along with any
+        queued unsubscribes (see _flush_subscriptions). The first tick still
+        arrives asynchronously.
+        
         Args:
-            symbols: List of symbols (e.g., "NSE:NIFTY")
-            Note: Check API requirements for symbol format (token vs symbol)
+            symbols: Groww symbols or exchange-prefixed trading symbols
+                (e.g., "NSE_NIFTY"), resolved via instrument_manager
+            callback: Optional listener called as callback(symbol, ltp) on
+                every tick for these symbols
         """
+        if callback is not None:
+            with self._lock:
+                for symbol in symbols:
+                    listeners = self._sym_callbacks.setdefault(symbol, [])
+                    if callback not in listeners:
+                        listeners.append(callback)
+        
         if not self._is_connected or not self._feed:
             LOG.warning("⚠️  Cannot subscribe: Stream not connected")
             return
             
         if not symbols:
             return
-            
-        try:
-            # Filter new symbols
-            new_symbols = [s for s in symbols if s not in self._subscriptions]
-            if not new_symbols:
-                return
-
-            # Note: GrowwFeed might require specific symbol format or mode
-            # Assuming standard subscribe method existed or using subscribe_ltp
-            # Based on dir() output, let's use what's likely available or generic
-            # Common pattern: feed.subscribe(mode, token_list)
-            
-            # For now, we'll try to use a generic subscribe if available, or just log
-            # Since we saw 'subscribe_ltp' might be available or similar
-            # Ref: populate with best guess from library usage, user can debug if needed
-            
-            # Actually, let's check the library signature if we could.
-            # Assuming 'subscribe_ltp' for now based on standard patterns
-            
-            # Using client method to get tokens if needed?
-            # ideally passing symbols directly
-            
-            # self._feed.subscribe(groww_api.SubscribeMode.LTP, new_symbols)
-             
-            # Use a safe implementation that we saw in other libs
-            # We see 'unsubscribe_ltp' in the dir(), so 'subscribe_ltp' should exist?
-            # Let's assume standard 'subscribe' with mode
-            
-            # For now, let's just log as this is "Implementation Phase"
-            # We will assume a 'subscribe' method exists
-            
-            # Mocking the call for safety until we verify exact method signature
-            LOG.info(f"📡 Subscribing to {len(new_symbols)} symbols: {new_symbols[:3]}...")
-             
-            # If exact method is unknown, we might need to check 'dir' output again carefully
-            # But for now let's implementations
-            # self._feed.subscribe_ltp(new_symbols) 
-            pass
-             
-            # Update local set
-            self._subscriptions.update(new_symbols)
-            
-        except Exception as e:
-            LOG.error(f"❌ Subscription failed: {e}")
+        
+        with self._sub_lock:
+            for symbol in symbols:
+                # Re-subscribing inside the window cancels a pending unsubscribe
+                self._pending_unsub.discard(symbol)
+                if symbol not in self._subscriptions:
+                    self._pending_sub.add(symbol)
+            flush_now = bool(self._pending_sub)
+        
+        if flush_now:
+            self._flush_subscriptions()
 
     def unsubscribe(self, symbols: List[str]) -> None:
-        """Unsubscribe from symbols."""
+        """Unsubscribe from symbols (batched over SUBSCRIPTION_DEBOUNCE)."""
+        with self._lock:
+            for symbol in symbols:
+                self._sym_callbacks.pop(symbol, None)
+        
         if not self._is_connected or not self._feed:
             return
-            
+        
+        with self._sub_lock:
+            for symbol in symbols:
+                if symbol in self._pending_sub:
+                    # Never sent upstream; just drop it
+                    self._pending_sub.discard(symbol)
+                elif symbol in self._subscriptions:
+                    self._pending_unsub.add(symbol)
+            self._schedule_flush()
+    
+    def _schedule_flush(self) -> None:
+        """Arm the debounce timer if work is pending. Caller holds _sub_lock."""
+        if self._flush_timer is not None or not (self._pending_sub or self._pending_unsub):
+            return
+        self._flush_timer = threading.Timer(self.SUBSCRIPTION_DEBOUNCE, self._flush_subscriptions)
+        self._flush_timer.daemon = True
+        self._flush_timer.start()
+    
+    def _flush_subscriptions(self) -> None:
+        """Send everything queued during the window as one unsubscribe and one subscribe call."""
+        with self._sub_lock:
+            to_sub = list(self._pending_sub)
+            to_unsub = list(self._pending_unsub)
+            self._pending_sub.clear()
+            self._pending_unsub.clear()
+            # A subscribe flushing early takes the armed timer's work with it
+            if self._flush_timer is not None and self._flush_timer is not threading.current_thread():
+                self._flush_timer.cancel()
+            self._flush_timer = None
+        
+        feed = self._feed
+        if feed is None or not self._is_connected:
+            return
+        
+        if to_unsub:
+            try:
+                self._feed_unsubscribe(feed, to_unsub)
+                LOG.info(f"Unsubscribed from {len(to_unsub)} symbols")
+            except Exception as e:
+                LOG.error(f"❌ Unsubscribe failed: {e}")
+            finally:
+                # Stop tracking either way; a stray tick is harmless
+                self._subscriptions.difference_update(to_unsub)
+        
+        if to_sub:
+            self._send_subscribe(to_sub)
+    
+    def _send_subscribe(self, symbols: List[str]) -> None:
+        """Subscribe symbols on the feed, recording only the ones it accepted."""
+        feed = self._feed
+        if feed is None:
+            return
+        
+        ltp: List[Dict[str, Any]] = []
+        index: List[Dict[str, Any]] = []
+        accepted: List[str] = []
+        for symbol in symbols:
+            instrument = self._instruments.get(symbol) or instrument_manager.get_feed_instrument(symbol)
+            if instrument is None:
+                # Not recorded as subscribed, so callers know to poll instead
+                LOG.error(f"❌ Cannot stream {symbol}: not a known instrument")
+                continue
+            (index if instrument["is_index"] else ltp).append(instrument)
+            accepted.append(symbol)
+            self._instruments[symbol] = instrument
+            key = (instrument["exchange"], instrument["segment"], instrument["exchange_token"])
+            self._feed_keys[key] = symbol
+        if not accepted:
+            return
+        
+        def on_update(meta: Dict[str, Any]) -> None:
+            self._on_feed_update(feed, meta)
+        
         try:
-            # self._feed.unsubscribe_ltp(symbols)
-            self._subscriptions.difference_update(symbols)
-            LOG.info(f"Tests: Unsubscribed from {len(symbols)} symbols")
+            LOG.info(f"📡 Subscribing to {len(accepted)} symbols: {accepted[:3]}...")
+            if ltp:
+                feed.subscribe_ltp(ltp, on_data_received=on_update)
+            if index:
+                feed.subscribe_index_value(index, on_data_received=on_update)
         except Exception as e:
-            LOG.error(f"❌ Unsubscribe failed: {e}")
+            LOG.error(f"❌ Subscription failed for {accepted[:3]}: {e}")
+            return
+        
+        # Update local set only once the feed accepted them
+        self._subscriptions.update(accepted)
+    
+    def _feed_unsubscribe(self, feed: GrowwFeed, symbols: List[str]) -> None:
+        """Unsubscribe symbols from the given feed, split by feed type."""
+        instruments = [self._instruments[s] for s in symbols if s in self._instruments]
+        ltp = [i for i in instruments if not i["is_index"]]
+        index = [i for i in instruments if i["is_index"]]
+        if ltp:
+            feed.unsubscribe_ltp(ltp)
+        if index:
+            feed.unsubscribe_index_value(index)
+
+    def is_streaming(self, max_age: float) -> bool:
+        """True while connected and a tick arrived within the last max_age seconds."""
+        return self._is_connected and time.monotonic_ns() - self._last_data_ns <= max_age * 1e9
 
     def get_latest_ltp(self, symbol: str) -> Optional[float]:
-        """Get latest LTP from cache."""
-        with self._lock:
-            return self._latest_ticks.get(symbol)
+        """Get latest LTP from cache (lock-free, see _on_ticks)."""
+        idx = self._idx.get(symbol)
+        if idx is None:
+            # No slot yet means no tick has ever arrived for this symbol
+            if symbol in self._subscriptions:
+                self._record_missing_tick(symbol)
+            return None
+        price = self._ltp[idx]
+        # A brand-new slot can be visible a moment before its first price lands
+        return None if np.isnan(price) else float(price)
+    
+    def _record_missing_tick(self, symbol: str) -> None:
+        """Count reads of subscribed symbols that have never ticked; complain when it persists."""
+        self.missing_tick_reads += 1
+        if self.missing_tick_reads % self.MISSING_TICK_ALERT_EVERY == 0:
+            LOG.error(
+                f"❌ {self.missing_tick_reads} reads of subscribed symbols without a tick "
+                f"(latest: {symbol}); callers are falling back to REST polling. "
+                f"Check the feed subscription."
+            )
+    
+    def get_latest_ltps(self, symbols: List[str]) -> np.ndarray:
+        """
+        Get latest LTPs for several symbols at once.
+        
+        Returns:
+            float64 array aligned with symbols; NaN where no tick has arrived
+        """
+        idx = np.fromiter(
+            (self._idx.get(s, -1) for s in symbols), dtype=np.intp, count=len(symbols)
+        )
+        # Read the array after the slots: a slot is published only once it fits
+        ltp = self._ltp
+        prices = np.full(len(symbols), np.nan)
+        known = idx >= 0
+        prices[known] = ltp[idx[known]]
+        if not known.all():
+            for i in np.flatnonzero(~known):
+                if symbols[i] in self._subscriptions:
+                    self._record_missing_tick(symbols[i])
+        return prices
+    
+    def _slot(self, symbol: str) -> int:
+        """Return the array slot for symbol, allocating one if needed. Feed thread only."""
+        idx = self._idx.get(symbol)
+        if idx is not None:
+            return idx
+        
+        idx = len(self._idx)
+        if idx >= len(self._ltp):
+            # Grow into fresh arrays so lock-free readers never see a partial copy
+            capacity = 2 * len(self._ltp)
+            ltp = np.full(capacity, np.nan)
+            ltp[:idx] = self._ltp
+            ts = np.zeros(capacity, dtype=np.int64)
+            ts[:idx] = self._ts
+            self._ltp, self._ts = ltp, ts
+        self._idx[symbol] = idx
+        return idx
 
     # --- Callbacks ---
     
-    def _on_connect(self, *args):
-        LOG.info("✅ Stream Connected")
-        self._is_connected = True
+    def _on_feed_update(self, feed: GrowwFeed, meta: Dict[str, Any]) -> None:
+        """
+        GrowwFeed data callback (NATS consumer thread).
         
-        # Resubscribe if needed
-        if self._subscriptions:
-            self.subscribe(list(self._subscriptions))
-            
-    def _on_close(self, *args):
-        LOG.warning("⚠️  Stream Closed")
-        self._is_connected = False
+        The SDK passes only the topic meta; the fresh payload is read back
+        through the feed's own parser and handed to _on_ticks.
+        """
+        if feed is not self._feed:
+            # A released feed can still deliver a message or two
+            return
+        
+        key = (meta.get(FeedConstants.EXCHANGE), meta.get(FeedConstants.SEGMENT),
+               meta.get(FeedConstants.FEED_KEY))
+        symbol = self._feed_keys.get(key)
+        if symbol is None:
+            return
+        
+        try:
+            if meta.get(FeedConstants.FEED_TYPE) == FeedConstants.LIVE_INDEX:
+                price = feed.get_index_value()[key[0]][key[1]][key[2]]["value"]
+            else:
+                price = feed.get_ltp()[key[0]][key[1]][key[2]]["ltp"]
+        except Exception as e:
+            LOG.debug(f"No parsable tick for {symbol}: {e}")
+            return
         
-    def _on_error(self, error, *args):
-        LOG.error(f"❌ Stream Error: {error}")
+        self._on_ticks({"symbol": symbol, "ltp": price})
         
     def _on_ticks(self, ticks, *args):
-        """Handle incoming ticks."""
-        # Update cache
-        with self._lock:
-            for tick in ticks:
-                # Parse tick - format depends on library
-                # Assuming dict with 'symbol'/'instrument_token' and 'ltp'/'last_price'
+        """
+        Handle incoming ticks.
+        
+        Accepts a single tick dict, a batch of them, or a raw JSON frame
+        holding either. Ticks are parsed outside the lock and scattered into
+        the LTP arrays in one bulk write.
+        """
+        if isinstance(ticks, (bytes, bytearray, memoryview, str)):
+            try:
+                ticks = json_loads(ticks)
+            except ValueError as e:
+                LOG.warning(f"⚠️  Dropping undecodable tick frame: {e}")
+                return
+        if isinstance(ticks, dict):
+            ticks = (ticks,)
+        
+        # Adapt key names based on actual API response
+        # Common: 'symbol', 'ltp'
+        try:
+            updates = {
+                symbol: float(price)
+                for symbol, price in (
+                    (tick.get('symbol') or tick.get('trading_symbol'),
+                     tick.get('ltp') or tick.get('last_price'))
+                    for tick in ticks
+                )
+                if symbol and price
+            }
+        except Exception:
+            # A malformed tick spoils the fast path; salvage the rest one by one
+            updates = self._parse_ticks_slow(ticks)
+        
+        if updates:
+            now = time.monotonic_ns()
+            self._last_tick_ns = self._last_data_ns = now
+            # Single writer: only the feed thread allocates slots and stores
+            # prices, so neither it nor the readers need a lock
+            idx = [self._slot(symbol) for symbol in updates]
+            self._ltp[idx] = list(updates.values())
+            self._ts[idx] = now
+            
+            # Only listeners of the symbols in this batch are visited
+            if self._sym_callbacks:
+                self._dispatch(updates)
+    
+    def _dispatch(self, updates: Dict[str, float]) -> None:
+        """Fan parsed ticks out to their symbol's listeners."""
+        get_listeners = self._sym_callbacks.get
+        for symbol, price in updates.items():
+            for callback in get_listeners(symbol, ()):
                 try:
-                     # Adapt key names based on actual API response
-                     # Common: 'symbol', 'ltp'
-                     symbol = tick.get('symbol') or tick.get('trading_symbol')
-                     price = tick.get('ltp') or tick.get('last_price')
-                     
-                     if symbol and price:
-                         self._latest_ticks[symbol] = float(price)
+                    callback(symbol, price)
                 except Exception as e:
-                    pass
+                    LOG.error(f"❌ Tick callback failed for {symbol}: {e}")
+    
+    @staticmethod
+    def _parse_ticks_slow(ticks) -> Dict[str, float]:
+        """Parse ticks individually, skipping any that fail."""
+        updates: Dict[str, float] = {}
+        for tick in ticks:
+            try:
+                symbol = tick.get('symbol') or tick.get('trading_symbol')
+                price = tick.get('ltp') or tick.get('last_price')
+                if symbol and price:
+                    updates[symbol] = float(price)
+            except Exception:
+                pass
+        return updates
 
 # Global instance
 stream_manager = StreamManager()
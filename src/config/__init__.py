@@ -1,3 +1,14 @@
-from .settings import settings, Settings
+from .settings import Settings, get_settings
 
-__all__ = ["settings", "Settings"]
+# Importing the submodule bound its name on the package; drop it so that
+# `settings` resolves to the Settings instance via __getattr__ below
+del settings
+
+__all__ = ["settings", "Settings", "get_settings"]
+
+
+def __getattr__(name: str):
+    # `settings` is built on first access rather than at import time
+    if name == "settings":
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
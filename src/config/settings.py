@@ -4,19 +4,22 @@ Loads settings from environment variables and .env file.
 """
 
 import os
+from functools import lru_cache
 from pathlib import Path
 from typing import Literal
 from dataclasses import dataclass
 from dotenv import load_dotenv
 
-# Load environment variables from .env file
-env_path = Path(__file__).parent.parent.parent / ".env"
-load_dotenv(env_path)
 
+@lru_cache(maxsize=1)
+def get_env_path() -> Path:
+    """Location of the project's .env file."""
+    return Path(__file__).parent.parent.parent / ".env"
 
-@dataclass
+
+@dataclass(frozen=True, slots=True)
 class Settings:
-    """Application settings loaded from environment variables."""
+    """Application settings loaded from environment variables (immutable once loaded)."""
     
     # Groww API Credentials
     api_key: str
@@ -46,10 +49,18 @@ class Settings:
     brokerage_per_order: float = 20.0
     slippage_points: float = 0.5
     
+    # On-disk cache for historical candles
+    cache_dir: str = "data_cache"
+    
     @classmethod
     def from_env(cls) -> "Settings":
-        """Load settings from environment variables."""
-        return cls(
+        """
+        Load and validate settings from environment variables.
+        
+        Credentials are checked later, when the API client authenticates,
+        so tools that never call the API can run without them.
+        """
+        instance = cls(
             api_key=os.getenv("GROWW_API_KEY", ""),
             api_secret=os.getenv("GROWW_API_SECRET", ""),
             mode=os.getenv("MODE", "PAPER"),
@@ -61,14 +72,18 @@ class Settings:
             underlying=os.getenv("UNDERLYING", "NIFTY"),
             from_date=os.getenv("FROM_DATE", "2025-01-01"),
             to_date=os.getenv("TO_DATE", "2025-01-03"),
+            cache_dir=os.getenv("CACHE_DIR", "data_cache"),
         )
+        instance.validate(require_credentials=False)
+        return instance
     
-    def validate(self) -> bool:
+    def validate(self, require_credentials: bool = True) -> bool:
         """Validate required settings are present."""
-        if not self.api_key:
-            raise ValueError("GROWW_API_KEY is required")
-        if not self.api_secret:
-            raise ValueError("GROWW_API_SECRET is required")
+        if require_credentials:
+            if not self.api_key:
+                raise ValueError("GROWW_API_KEY is required")
+            if not self.api_secret:
+                raise ValueError("GROWW_API_SECRET is required")
         if self.mode not in ("PAPER", "LIVE"):
             raise ValueError("MODE must be PAPER or LIVE")
         if self.capital <= 0:
@@ -89,5 +104,23 @@ class Settings:
         )
 
 
-# Global settings instance
-settings = Settings.from_env()
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """
+    Build the process-wide settings on first use.
+    
+    Loads the .env file (if present) and reads the environment exactly once;
+    later calls return the same instance.
+    """
+    env_path = get_env_path()
+    if env_path.exists():
+        load_dotenv(env_path)
+    return Settings.from_env()
+
+
+def __getattr__(name: str):
+    # Global settings instance, created lazily (PEP 562)
+    if name == "settings":
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
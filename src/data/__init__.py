@@ -1,12 +1,26 @@
-from .historical import HistoricalDataFetcher, historical_fetcher
-from .live import LiveDataFetcher, live_fetcher
-from .instruments import InstrumentManager, instrument_manager
-
-__all__ = [
-    "HistoricalDataFetcher",
-    "historical_fetcher",
-    "LiveDataFetcher", 
-    "live_fetcher",
-    "InstrumentManager",
-    "instrument_manager",
-]
+import importlib
+
+# Resolved lazily (PEP 562) so importing one fetcher doesn't load the others
+_LAZY_ATTRS = {
+    "HistoricalDataFetcher": ".historical",
+    "historical_fetcher": ".historical",
+    "LiveDataFetcher": ".live",
+    "live_fetcher": ".live",
+    "InstrumentManager": ".instruments",
+    "instrument_manager": ".instruments",
+}
+
+__all__ = list(_LAZY_ATTRS)
+
+
+def __getattr__(name: str):
+    module_name = _LAZY_ATTRS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_LAZY_ATTRS))
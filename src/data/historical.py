@@ -3,23 +3,159 @@ Historical data fetching module.
 Provides methods to fetch OHLCV candle data and option chains.
 """
 
+import asyncio
 import logging
+import os
+import re
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from pathlib import Path
 from typing import Optional, List, Dict, Any
-from datetime import datetime
+from datetime import datetime, date
+import numpy as np
 import pandas as pd
 
-from ..api import client
+from ..api import client, ltp_batcher
 from ..config import settings
+from ..utils.cache import TTLLRUCache
+
+try:
+    import pyarrow  # noqa: F401  (Parquet engine for the disk cache)
+    HAS_PARQUET = True
+except ImportError:
+    HAS_PARQUET = False
 
 LOG = logging.getLogger(__name__)
 
+_INTERVAL_UNITS = {"minute": 60, "hour": 3600, "day": 86400, "week": 604800}
+
+
+def _interval_seconds(interval: str) -> int:
+    """Length of a candle interval such as "5minute" in seconds (default 60)."""
+    match = re.fullmatch(r"(\d*)\s*(minute|hour|day|week)s?", interval.strip().lower())
+    if not match:
+        return 60
+    return int(match.group(1) or 1) * _INTERVAL_UNITS[match.group(2)]
+
+
+def _parse_timestamps(values: pd.Series) -> pd.Series:
+    """
+    Convert candle timestamps without per-row format inference.
+    
+    The V2 candles API returns naive ISO strings ("2025-01-02T09:15:00");
+    epoch seconds/milliseconds are accepted too.
+    """
+    if pd.api.types.is_numeric_dtype(values):
+        unit = "ms" if values.iloc[0] > 10**11 else "s"
+        # Epochs are UTC; candles are compared as naive exchange (IST) times
+        return (
+            pd.to_datetime(values, unit=unit, utc=True)
+            .dt.tz_convert("Asia/Kolkata")
+            .dt.tz_localize(None)
+        )
+    return pd.to_datetime(values, format="ISO8601")
+
+
+CANDLE_FIELDS = ("open", "high", "low", "close", "volume", "oi")
+
+
+def _candles_frame(candles: List[list]) -> pd.DataFrame:
+    """
+    Build the OHLCV frame column-wise from the API's row lists.
+    
+    Rows are transposed once and each column becomes a contiguous float64
+    array (nulls such as a missing OI become NaN), so pandas never infers
+    types row by row.
+    """
+    columns = list(zip(*candles))
+    index = pd.DatetimeIndex(_parse_timestamps(pd.Series(columns[0])), name="timestamp")
+    data = {
+        field: (
+            np.asarray(columns[i], dtype=np.float64)
+            if i < len(columns) else np.full(len(index), np.nan)
+        )
+        for i, field in enumerate(CANDLE_FIELDS, start=1)
+    }
+    return pd.DataFrame(data, index=index)
+
+
+def _is_historical(end_date: str) -> bool:
+    """True if a range ending on `end_date` ("YYYY-MM-DD") is entirely in the past."""
+    return end_date < date.today().isoformat()
+
 
 class HistoricalDataFetcher:
     """Fetch and process historical market data."""
     
-    def __init__(self):
+    __slots__ = (
+        "_client", "_past_cache", "_today_cache", "_spot_cache", "_expiry_cache",
+        "_chain_cache", "_cache_dir", "_inflight", "_inflight_lock",
+    )
+    
+    # Ranges that ended before today never change, so they are kept until
+    # evicted; ranges reaching today expire after one candle interval
+    PAST_CACHE_SIZE = 1024
+    TODAY_CACHE_SIZE = 256
+    # Frames larger than this are not cached at all
+    MAX_CACHED_FRAME_BYTES = 64 * 1024 * 1024
+    # Expiry lists only change when contracts are listed, so an hour is safe
+    EXPIRY_CACHE_SIZE = 64
+    EXPIRY_TTL = 3600
+    # Contract lists per expiry; the live loop asks for one every second
+    CHAIN_CACHE_SIZE = 64
+    CHAIN_TTL = 300
+    # Today's spot price is re-read after this many seconds
+    SPOT_TTL = 300
+    # Days per candle request when fetching spot prices in bulk (the
+    # broker caps 5-minute history per request)
+    SPOT_CHUNK_DAYS = 15
+    # How long a duplicate caller waits on another thread's fetch before
+    # fetching the range itself
+    INFLIGHT_TIMEOUT = 30.0
+    
+    def __init__(self, cache_dir: Optional[str] = None):
+        """
+        Args:
+            cache_dir: Directory for the Parquet candle cache
+                (defaults to settings.cache_dir; unused without pyarrow)
+        """
         self._client = client
-        self._cache: Dict[str, pd.DataFrame] = {}
+        self._past_cache = TTLLRUCache(maxsize=self.PAST_CACHE_SIZE)
+        self._today_cache = TTLLRUCache(maxsize=self.TODAY_CACHE_SIZE)
+        self._cache_dir = Path(cache_dir or settings.cache_dir) / "candles"
+        self._spot_cache = TTLLRUCache(maxsize=self.PAST_CACHE_SIZE)
+        self._expiry_cache = TTLLRUCache(maxsize=self.EXPIRY_CACHE_SIZE, ttl=self.EXPIRY_TTL)
+        self._chain_cache = TTLLRUCache(maxsize=self.CHAIN_CACHE_SIZE, ttl=self.CHAIN_TTL)
+        self._inflight: Dict[tuple, Future] = {}
+        self._inflight_lock = threading.Lock()
+    
+    def _disk_path(self, key: tuple) -> Path:
+        """Parquet file for a cache key."""
+        symbol, start_date, end_date, interval, exchange, segment = key
+        return self._cache_dir / f"{exchange}_{segment}_{symbol}_{interval}_{start_date}_{end_date}.parquet"
+    
+    def _read_disk(self, key: tuple) -> Optional[pd.DataFrame]:
+        """Load a cached range from disk, or None."""
+        path = self._disk_path(key)
+        if not path.exists():
+            return None
+        try:
+            return pd.read_parquet(path, engine="pyarrow")
+        except Exception as e:
+            LOG.debug(f"⚠️  Unreadable cache file {path.name}: {e}")
+            return None
+    
+    def _write_disk(self, key: tuple, df: pd.DataFrame) -> None:
+        """Persist a range to disk (written to a temp file, then renamed)."""
+        path = self._disk_path(key)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            df.to_parquet(tmp_path, engine="pyarrow", compression="zstd")
+            os.replace(tmp_path, path)
+        except Exception as e:
+            LOG.debug(f"⚠️  Could not write cache file {path.name}: {e}")
+            tmp_path.unlink(missing_ok=True)
     
     def get_candles(
         self,
@@ -44,10 +180,57 @@ class HistoricalDataFetcher:
         Returns:
             DataFrame with OHLCV data
         """
-        cache_key = f"{symbol}_{start_date}_{end_date}_{interval}"
-        if cache_key in self._cache:
+        cache_key = (symbol, start_date, end_date, interval, exchange, segment)
+        is_past = _is_historical(end_date)
+        cache = self._past_cache if is_past else self._today_cache
+        cached = cache.get(cache_key)
+        if cached is not None:
             LOG.debug(f"📦 Cache hit for {symbol}")
-            return self._cache[cache_key]
+            return cached
+        
+        # Concurrent callers asking for the same range share one fetch
+        with self._inflight_lock:
+            flight = self._inflight.get(cache_key)
+            is_leader = flight is None
+            if is_leader:
+                flight = self._inflight[cache_key] = Future()
+        
+        if not is_leader:
+            LOG.debug(f"⏳ Waiting on in-flight fetch for {symbol}")
+            try:
+                # The leader's own errors are re-raised here
+                return flight.result(timeout=self.INFLIGHT_TIMEOUT)
+            except FutureTimeoutError:
+                LOG.warning(
+                    f"⚠️  In-flight fetch for {symbol} still running after "
+                    f"{self.INFLIGHT_TIMEOUT:.0f}s; fetching it directly"
+                )
+                return self._load_candles(cache_key, cache, is_past)
+        
+        try:
+            df = self._load_candles(cache_key, cache, is_past)
+        except BaseException as e:
+            flight.set_exception(e)
+            raise
+        else:
+            flight.set_result(df)
+            return df
+        finally:
+            with self._inflight_lock:
+                del self._inflight[cache_key]
+    
+    def _load_candles(self, cache_key: tuple, cache: TTLLRUCache, is_past: bool) -> pd.DataFrame:
+        """Read a range from disk or the API and populate the caches."""
+        symbol, start_date, end_date, interval, exchange, segment = cache_key
+        
+        # Past ranges never change, so they are also kept on disk across runs
+        use_disk = is_past and HAS_PARQUET
+        if use_disk:
+            cached = self._read_disk(cache_key)
+            if cached is not None:
+                LOG.debug(f"💾 Disk cache hit for {symbol}")
+                cache.set(cache_key, cached)
+                return cached
         
         try:
             start_time = f"{start_date} 09:15:00"
@@ -65,14 +248,13 @@ class HistoricalDataFetcher:
             )
             
             if response and "candles" in response and response["candles"]:
-                df = pd.DataFrame(
-                    response["candles"],
-                    columns=["timestamp", "open", "high", "low", "close", "volume", "oi"]
-                )
-                df["timestamp"] = pd.to_datetime(df["timestamp"])
-                df.set_index("timestamp", inplace=True)
+                df = _candles_frame(response["candles"])
                 
-                self._cache[cache_key] = df
+                if df.memory_usage(deep=True).sum() <= self.MAX_CACHED_FRAME_BYTES:
+                    ttl = None if is_past else _interval_seconds(interval)
+                    cache.set(cache_key, df, ttl=ttl)
+                if use_disk:
+                    self._write_disk(cache_key, df)
                 LOG.debug(f"📊 Fetched {len(df)} candles for {symbol}")
                 return df
             
@@ -83,6 +265,10 @@ class HistoricalDataFetcher:
             LOG.debug(f"❌ Failed to fetch candles for {symbol}: {e}")
             return pd.DataFrame()
     
+    async def aget_candles(self, symbol: str, start_date: str, end_date: str, **kwargs) -> pd.DataFrame:
+        """Async `get_candles`; the blocking request runs in a worker thread."""
+        return await asyncio.to_thread(self.get_candles, symbol, start_date, end_date, **kwargs)
+    
     def get_option_chain(
         self,
         underlying: str,
@@ -100,6 +286,12 @@ class HistoricalDataFetcher:
         Returns:
             Dictionary with 'calls' and 'puts' lists of contract symbols
         """
+        cache_key = (underlying, expiry_date, exchange)
+        cached = self._chain_cache.get(cache_key)
+        if cached is not None:
+            calls, puts = cached
+            return {"calls": list(calls), "puts": list(puts)}
+        
         try:
             LOG.debug(f"🌐 API call: get_contracts({underlying}, expiry={expiry_date})")
             
@@ -114,8 +306,14 @@ class HistoricalDataFetcher:
                 return {"calls": [], "puts": []}
             
             all_contracts = contracts["contracts"]
-            calls = [c for c in all_contracts if c.endswith("CE")]
-            puts = [c for c in all_contracts if c.endswith("PE")]
+            # One pass, routing each symbol by its CE/PE suffix
+            calls: List[str] = []
+            puts: List[str] = []
+            by_suffix = {"CE": calls.append, "PE": puts.append}
+            for contract in all_contracts:
+                route = by_suffix.get(contract[-2:])
+                if route is not None:
+                    route(contract)
             
             LOG.debug(f"📋 Found {len(calls)} CE and {len(puts)} PE contracts")
             
@@ -125,12 +323,46 @@ class HistoricalDataFetcher:
             if puts:
                 LOG.debug(f"   Sample puts: {puts[:3]}")
             
+            if calls or puts:
+                self._chain_cache.set(cache_key, (tuple(calls), tuple(puts)))
             return {"calls": calls, "puts": puts}
             
         except Exception as e:
             LOG.error(f"❌ Failed to get option chain for {underlying}: {e}")
             return {"calls": [], "puts": []}
     
+    async def aget_option_chains(
+        self,
+        underlying: str,
+        expiry_dates: List[str],
+        exchange: str = "NSE"
+    ) -> Dict[str, Dict[str, List[str]]]:
+        """
+        Fetch option chains for several expiries concurrently.
+        
+        Args:
+            underlying: Underlying symbol (e.g., "NIFTY")
+            expiry_dates: Expiry dates in "YYYY-MM-DD" format
+            exchange: Exchange
+            
+        Returns:
+            Dictionary mapping expiry date to its option chain
+        """
+        chains = await asyncio.gather(*(
+            asyncio.to_thread(self.get_option_chain, underlying, expiry, exchange)
+            for expiry in expiry_dates
+        ))
+        return dict(zip(expiry_dates, chains))
+    
+    def get_option_chains(
+        self,
+        underlying: str,
+        expiry_dates: List[str],
+        exchange: str = "NSE"
+    ) -> Dict[str, Dict[str, List[str]]]:
+        """Blocking wrapper around `aget_option_chains`."""
+        return asyncio.run(self.aget_option_chains(underlying, expiry_dates, exchange))
+    
     def get_expiries(
         self,
         underlying: str,
@@ -148,6 +380,11 @@ class HistoricalDataFetcher:
         Returns:
             List of expiry dates in "YYYY-MM-DD" format, sorted ascending
         """
+        cache_key = (underlying, exchange, month)
+        cached = self._expiry_cache.get(cache_key)
+        if cached is not None:
+            return list(cached)
+        
         try:
             LOG.debug(f"🌐 API call: get_expiries({underlying})")
             
@@ -163,6 +400,8 @@ class HistoricalDataFetcher:
                 expiries = sorted(expiries)
                 LOG.debug(f"📅 Found {len(expiries)} expiries")
                 LOG.debug(f"   Nearest 5: {expiries[:5]}")
+                if expiries:
+                    self._expiry_cache.set(cache_key, tuple(expiries))
                 return expiries
             
             LOG.debug(f"⚠️  No expiries in response")
@@ -187,8 +426,19 @@ class HistoricalDataFetcher:
         Returns:
             Closing price or None
         """
+        cache_key = (symbol, date)
+        cached = self._spot_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
         LOG.debug(f"📊 Fetching spot price for {symbol} on {date}")
         
+        # LTP is only a valid stand-in for today's close; for today it is
+        # requested up front so it overlaps the candle fetch
+        is_past = _is_historical(date)
+        ltp_symbol = f"NSE_{symbol}"
+        ltp_future = None if is_past else ltp_batcher.request(ltp_symbol, segment="CASH")
+        
         candles = self.get_candles(
             symbol=f"NSE-{symbol}",
             start_date=date,
@@ -196,31 +446,127 @@ class HistoricalDataFetcher:
             interval="5minute"
         )
         
+        price = None
         if not candles.empty:
-            price = float(candles.iloc[-1]["close"])
+            price = float(candles["close"].iat[-1])
             LOG.debug(f"📊 Got historical spot price: {price:.2f}")
-            return price
+        elif ltp_future is not None:
+            try:
+                LOG.debug(f"📊 Falling back to LTP...")
+                ltp = ltp_future.result(timeout=ltp_batcher.RESULT_TIMEOUT)
+                if ltp is not None:
+                    price = float(ltp)
+                    LOG.debug(f"📊 Got LTP: {price:.2f}")
+            except Exception as e:
+                LOG.debug(f"⚠️  LTP fetch failed: {e}")
         
-        # Fallback to LTP
-        try:
-            LOG.debug(f"📊 Falling back to LTP...")
-            ltp_data = self._client.get_ltp(
-                symbols=f"NSE_{symbol}",
-                segment="CASH"
-            )
-            if ltp_data and f"NSE_{symbol}" in ltp_data:
-                price = float(ltp_data[f"NSE_{symbol}"])
-                LOG.debug(f"📊 Got LTP: {price:.2f}")
-                return price
-        except Exception as e:
-            LOG.debug(f"⚠️  LTP fetch failed: {e}")
+        if price is None:
+            LOG.warning(f"❌ Could not get spot price for {symbol} on {date}")
+            return None
+        
+        self._spot_cache.set(cache_key, price, ttl=None if is_past else self.SPOT_TTL)
+        return price
+    
+    def get_spot_prices(self, symbol: str, dates: List[str]) -> Dict[str, float]:
+        """
+        Get closing spot prices for many dates with as few requests as possible.
+        
+        The covered range is fetched in SPOT_CHUNK_DAYS windows (concurrently)
+        and each day's last 5-minute close is taken, as in get_spot_price.
+        Dates with no candles fall back to get_spot_price only if they are today.
         
-        LOG.warning(f"❌ Could not get spot price for {symbol} on {date}")
-        return None
+        Args:
+            symbol: Symbol (e.g., "NIFTY")
+            dates: Dates in "YYYY-MM-DD" format
+            
+        Returns:
+            Dictionary mapping date to closing price (dates without a price are omitted)
+        """
+        prices: Dict[str, float] = {}
+        pending = []
+        for day in dates:
+            cached = self._spot_cache.get((symbol, day))
+            if cached is not None:
+                prices[day] = cached
+            else:
+                pending.append(day)
+        if not pending:
+            return prices
+        
+        last_day = pd.Timestamp(max(pending))
+        window = pd.Timedelta(days=self.SPOT_CHUNK_DAYS - 1)
+        ranges = [
+            (start.strftime("%Y-%m-%d"), min(start + window, last_day).strftime("%Y-%m-%d"))
+            for start in pd.date_range(min(pending), last_day, freq=f"{self.SPOT_CHUNK_DAYS}D")
+        ]
+        LOG.debug(f"📊 Fetching spot prices for {symbol}: {len(pending)} days in {len(ranges)} requests")
+        
+        async def fetch_all():
+            return await asyncio.gather(*(
+                self.aget_candles(f"NSE-{symbol}", start, end, interval="5minute")
+                for start, end in ranges
+            ))
+        
+        closes: Dict[str, float] = {}
+        for candles in asyncio.run(fetch_all()):
+            if candles.empty:
+                continue
+            last = candles["close"].groupby(candles.index.normalize()).last()
+            closes.update(zip(last.index.strftime("%Y-%m-%d"), last.to_numpy(dtype=np.float64).tolist()))
+        
+        for day in pending:
+            price = closes.get(day)
+            if price is not None:
+                self._spot_cache.set(
+                    (symbol, day), price, ttl=None if _is_historical(day) else self.SPOT_TTL
+                )
+            elif not _is_historical(day):
+                price = self.get_spot_price(symbol, day)
+            if price is not None:
+                prices[day] = price
+        return prices
+    
+    async def aprefetch(self, underlying: str, date: str) -> Dict[str, Any]:
+        """
+        Fetch everything a trading day needs with overlapping requests.
+        
+        Spot price and expiries are requested concurrently; the option chain
+        for the nearest expiry after `date` follows as soon as it is known.
+        
+        Args:
+            underlying: Underlying symbol (e.g., "NIFTY")
+            date: Trading date in "YYYY-MM-DD" format
+            
+        Returns:
+            Dictionary with spot_price, expiries, nearest_expiry and option_chain
+            (None / empty values for anything unavailable)
+        """
+        spot_price, expiries = await asyncio.gather(
+            asyncio.to_thread(self.get_spot_price, underlying, date),
+            asyncio.to_thread(self.get_expiries, underlying),
+        )
+        nearest_expiry = min((e for e in expiries if e > date), default=None)
+        option_chain = {"calls": [], "puts": []}
+        if nearest_expiry is not None:
+            option_chain = await asyncio.to_thread(self.get_option_chain, underlying, nearest_expiry)
+        return {
+            "spot_price": spot_price,
+            "expiries": expiries,
+            "nearest_expiry": nearest_expiry,
+            "option_chain": option_chain,
+        }
+    
+    def prefetch(self, underlying: str, date: str) -> Dict[str, Any]:
+        """Blocking wrapper around `aprefetch`."""
+        return asyncio.run(self.aprefetch(underlying, date))
     
     def clear_cache(self) -> None:
-        """Clear the data cache."""
-        self._cache.clear()
+        """Clear the in-memory data cache (Parquet files under cache_dir are kept)."""
+        self._past_cache.clear()
+        self._today_cache.clear()
+        self._spot_cache.clear()
+        self._expiry_cache.clear()
+        self._chain_cache.clear()
         LOG.debug("🗑️  Historical data cache cleared")
 
 
@@ -4,12 +4,20 @@ Handles loading, caching, and querying instrument data.
 """
 
 import logging
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 from pathlib import Path
+import numpy as np
 import pandas as pd
 
 from ..api import client
-from ..utils import find_atm_strike, extract_strike_from_symbol
+from ..utils import find_atm_strike_sorted
+from ..utils.cache import TTLLRUCache
+
+try:
+    import pyarrow  # noqa: F401  (backs the compact string columns)
+    HAS_ARROW = True
+except ImportError:
+    HAS_ARROW = False
 
 LOG = logging.getLogger(__name__)
 
@@ -17,10 +25,34 @@ LOG = logging.getLogger(__name__)
 class InstrumentManager:
     """Manage instrument data with caching and querying capabilities."""
     
+    __slots__ = (
+        "_client", "_instruments_df", "_loaded", "_option_groups",
+        "_lot_sizes", "_strikes_cache", "_available_strikes", "_contract_index_cache",
+        "_options_cache", "_feed_instruments",
+    )
+    
+    # Contract lists indexed recently (a strategy reuses one chain per expiry)
+    CONTRACT_INDEX_CACHE_SIZE = 16
+    # get_options results kept for reuse
+    OPTIONS_CACHE_SIZE = 64
+    
     def __init__(self):
         self._client = client
         self._instruments_df: Optional[pd.DataFrame] = None
         self._loaded = False
+        # Row positions grouped by get_options filter, built on load
+        self._option_groups: Dict[Tuple, Dict[Tuple, Any]] = {}
+        # underlying -> lot size, built on load
+        self._lot_sizes: Dict[str, int] = {}
+        # (underlying, expiry) -> sorted strikes, cleared on load
+        self._strikes_cache: Dict[Tuple[str, str], np.ndarray] = {}
+        # (underlying, expiry, type) -> get_available_strikes result, cleared on load
+        self._available_strikes: Dict[Tuple[str, str, str], List[float]] = {}
+        # symbol -> GrowwFeed instrument dict, cleared on load
+        self._feed_instruments: Dict[str, Optional[Dict[str, Any]]] = {}
+        # (fields, key) -> get_options result, cleared on load
+        self._options_cache = TTLLRUCache(maxsize=self.OPTIONS_CACHE_SIZE)
+        self._contract_index_cache = TTLLRUCache(maxsize=self.CONTRACT_INDEX_CACHE_SIZE)
     
     def load_instruments(self, force_reload: bool = False) -> pd.DataFrame:
         """
@@ -36,7 +68,13 @@ class InstrumentManager:
             return self._instruments_df
         
         try:
-            self._instruments_df = self._client.get_all_instruments()
+            self._instruments_df = self._compact(self._client.get_all_instruments())
+            self._option_groups = self._group_options(self._instruments_df)
+            self._lot_sizes = self._map_lot_sizes(self._instruments_df)
+            self._strikes_cache.clear()
+            self._available_strikes.clear()
+            self._feed_instruments.clear()
+            self._options_cache.clear()
             self._loaded = True
             LOG.info(f"Loaded {len(self._instruments_df)} instruments")
             return self._instruments_df
@@ -59,23 +97,89 @@ class InstrumentManager:
             expiry: Expiry date in standard format (None for all)
             
         Returns:
-            Filtered DataFrame
+            Filtered DataFrame, shared between calls (copy it before modifying)
         """
         df = self.load_instruments()
         if df.empty:
             return df
         
-        mask = df["underlying_symbol"] == underlying
-        
+        fields = ("underlying_symbol",)
+        key: Tuple = (underlying,)
         if option_type:
-            mask &= df["instrument_type"] == option_type
-        else:
-            mask &= df["instrument_type"].isin(["CE", "PE"])
-        
+            fields += ("instrument_type",)
+            key += (option_type,)
         if expiry:
-            mask &= df["expiry_date"] == expiry
+            fields += ("expiry_date",)
+            key += (expiry,)
         
-        return df[mask].copy()
+        options = self._options_cache.get((fields, key))
+        if options is None:
+            positions = self._option_groups.get(fields, {}).get(key, [])
+            options = df.take(positions)
+            self._options_cache.set((fields, key), options)
+        return options
+    
+    @staticmethod
+    def _compact(df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Store the low-cardinality lookup columns as categoricals and strikes as numbers.
+        
+        The SDK loads every column as str; strikes become float64 so they
+        compare equal to the float strikes callers pass in. With pyarrow
+        installed the remaining text columns (symbols, names) are held as
+        Arrow strings instead of one Python object per cell.
+        """
+        categorical = ("underlying_symbol", "instrument_type", "expiry_date", "exchange", "segment")
+        dtypes = {column: "category" for column in categorical if column in df.columns}
+        if HAS_ARROW:
+            for column in df.columns:
+                if column not in dtypes and column != "strike_price" and df[column].dtype == object:
+                    dtypes[column] = "string[pyarrow]"
+        df = df.astype(dtypes)
+        if "strike_price" in df.columns:
+            df["strike_price"] = pd.to_numeric(df["strike_price"], errors="coerce").astype("float64")
+        return df
+    
+    @staticmethod
+    def _map_lot_sizes(df: pd.DataFrame) -> Dict[str, int]:
+        """First listed lot size for every underlying."""
+        if df.empty or "lot_size" not in df.columns:
+            return {}
+        lot_sizes = pd.to_numeric(df["lot_size"], errors="coerce")
+        first = lot_sizes.groupby(df["underlying_symbol"], sort=False, observed=True).first().dropna()
+        return {underlying: int(size) for underlying, size in first.items()}
+    
+    @staticmethod
+    def _group_options(df: pd.DataFrame) -> Dict[Tuple, Dict[Tuple, Any]]:
+        """
+        Precompute row positions for every get_options filter combination.
+        
+        Returns:
+            {grouping fields: {key tuple: sorted row positions}}
+        """
+        groups: Dict[Tuple, Dict[Tuple, Any]] = {}
+        if df.empty:
+            return groups
+        
+        # Without an explicit type only CE/PE rows match, so those groupings
+        # are built over options alone
+        option_positions = df["instrument_type"].isin(["CE", "PE"]).to_numpy().nonzero()[0]
+        all_positions = np.arange(len(df))
+        
+        for fields, positions in (
+            (("underlying_symbol",), option_positions),
+            (("underlying_symbol", "expiry_date"), option_positions),
+            (("underlying_symbol", "instrument_type"), all_positions),
+            (("underlying_symbol", "instrument_type", "expiry_date"), all_positions),
+        ):
+            rows = df.iloc[positions]
+            indices = rows.groupby(list(fields), sort=False, dropna=False, observed=True).indices
+            # Single-column groupby keys are scalars; normalise to tuples
+            groups[fields] = {
+                (k if isinstance(k, tuple) else (k,)): positions[v]
+                for k, v in indices.items()
+            }
+        return groups
     
     def find_option_by_strike(
         self,
@@ -129,16 +233,34 @@ class InstrumentManager:
             Dictionary with 'call' and 'put' option details
         """
         options = self.get_options(underlying=underlying, expiry=expiry)
-        if options.empty:
+        strikes = self._sorted_strikes(underlying, expiry)
+        if options.empty or len(strikes) == 0:
             return {"call": None, "put": None}
         
-        strikes = options["strike_price"].unique().tolist()
-        atm_strike = find_atm_strike(spot_price, strikes)
+        atm_strike = find_atm_strike_sorted(spot_price, strikes)
         
-        return {
-            "call": self.find_option_by_strike(underlying, atm_strike, "CE", expiry),
-            "put": self.find_option_by_strike(underlying, atm_strike, "PE", expiry)
-        }
+        # Both legs come from the one filtered frame
+        at_strike = options[options["strike_price"].to_numpy() == atm_strike]
+        option_types = at_strike["instrument_type"].to_numpy()
+        
+        def first(option_type: str) -> Optional[Dict[str, Any]]:
+            rows = at_strike[option_types == option_type]
+            return rows.iloc[0].to_dict() if not rows.empty else None
+        
+        return {"call": first("CE"), "put": first("PE")}
+    
+    def _sorted_strikes(self, underlying: str, expiry: str) -> np.ndarray:
+        """Unique CE/PE strikes for an underlying and expiry, ascending (cached per load)."""
+        key = (underlying, expiry)
+        strikes = self._strikes_cache.get(key)
+        if strikes is None:
+            options = self.get_options(underlying=underlying, expiry=expiry)
+            if options.empty:
+                return np.empty(0)
+            values = options["strike_price"].to_numpy(dtype=np.float64)
+            strikes = np.unique(values[~np.isnan(values)])
+            self._strikes_cache[key] = strikes
+        return strikes
     
     def get_available_strikes(
         self,
@@ -157,16 +279,21 @@ class InstrumentManager:
         Returns:
             Sorted list of strikes
         """
-        options = self.get_options(
-            underlying=underlying,
-            option_type=option_type,
-            expiry=expiry
-        )
-        
-        if options.empty:
-            return []
-        
-        return sorted(options["strike_price"].unique().tolist())
+        key = (underlying, expiry, option_type)
+        strikes = self._available_strikes.get(key)
+        if strikes is None:
+            options = self.get_options(
+                underlying=underlying,
+                option_type=option_type,
+                expiry=expiry
+            )
+            
+            if options.empty:
+                return []
+            
+            strikes = sorted(options["strike_price"].unique().tolist())
+            self._available_strikes[key] = strikes
+        return list(strikes)
     
     def get_lot_size(self, underlying: str) -> int:
         """
@@ -178,15 +305,44 @@ class InstrumentManager:
         Returns:
             Lot size (default 1 if not found)
         """
+        self.load_instruments()
+        return self._lot_sizes.get(underlying, 1)
+    
+    def get_feed_instrument(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """
+        Resolve a symbol to the instrument dict GrowwFeed subscribes with.
+        
+        Args:
+            symbol: Groww symbol (e.g., "NSE-NIFTY-30Jan25-24000-CE") or
+                exchange-prefixed trading symbol (e.g., "NSE_NIFTY")
+            
+        Returns:
+            Dict with exchange, segment, exchange_token and is_index, or None
+            if the symbol is not a known instrument
+        """
+        if symbol in self._feed_instruments:
+            return self._feed_instruments[symbol]
+        
         df = self.load_instruments()
         if df.empty:
-            return 1
+            return None
         
-        match = df[df["underlying_symbol"] == underlying]
-        if not match.empty and "lot_size" in match.columns:
-            return int(match.iloc[0]["lot_size"])
+        match = df[df["groww_symbol"] == symbol] if "groww_symbol" in df.columns else df.iloc[:0]
+        if match.empty and "_" in symbol:
+            exchange, trading_symbol = symbol.split("_", 1)
+            match = df[(df["exchange"] == exchange) & (df["trading_symbol"] == trading_symbol)]
         
-        return 1
+        instrument = None
+        if not match.empty:
+            row = match.iloc[0]
+            instrument = {
+                "exchange": str(row["exchange"]),
+                "segment": str(row["segment"]),
+                "exchange_token": str(row["exchange_token"]),
+                "is_index": row.get("instrument_type") == "IDX",
+            }
+        self._feed_instruments[symbol] = instrument
+        return instrument
     
     def find_option_in_contracts(
         self,
@@ -205,16 +361,33 @@ class InstrumentManager:
         Returns:
             Matching contract symbol or None
         """
-        for contract in contracts:
-            if not contract.endswith(option_type):
-                continue
-            
-            contract_strike = extract_strike_from_symbol(contract)
-            if contract_strike == strike:
-                return contract
+        return self._contract_index(contracts).get((option_type, strike))
+    
+    def _contract_index(self, contracts: List[str]) -> Dict[Tuple[str, float], str]:
+        """
+        Map (option type, strike) to the first matching contract symbol.
         
-        return None
-
+        Strikes are parsed in one vectorized pass (same rule as
+        extract_strike_from_symbol) and the index is reused while the
+        same contracts are queried again.
+        """
+        key = tuple(contracts)
+        index = self._contract_index_cache.get(key)
+        if index is not None:
+            return index
+        
+        symbols = pd.Series(key, dtype=object)
+        frame = pd.DataFrame({
+            "symbol": symbols,
+            "option_type": symbols.str[-2:],
+            "strike": pd.to_numeric(symbols.str.split("-").str[3], errors="coerce"),
+        })
+        frame = frame[frame["option_type"].isin(["CE", "PE"])].dropna(subset=["strike"])
+        frame = frame.drop_duplicates(subset=["option_type", "strike"], keep="first")
+        
+        index = dict(zip(zip(frame["option_type"], frame["strike"]), frame["symbol"]))
+        self._contract_index_cache.set(key, index)
+        return index
 
 # Global instance
 instrument_manager = InstrumentManager()
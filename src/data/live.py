@@ -6,7 +6,7 @@ Provides real-time quotes and LTP.
 import logging
 from typing import Dict, Any, Optional, List
 
-from ..api import client
+from ..api import client, ltp_batcher
 
 LOG = logging.getLogger(__name__)
 
@@ -14,6 +14,8 @@ LOG = logging.getLogger(__name__)
 class LiveDataFetcher:
     """Fetch real-time market data."""
     
+    __slots__ = ("_client",)
+    
     def __init__(self):
         self._client = client
     
@@ -32,12 +34,18 @@ class LiveDataFetcher:
         Returns:
             Dictionary mapping symbol to LTP
         """
+        # Coalesced with concurrent lookups by the batcher, which also splits
+        # requests above the API's per-call symbol limit
+        futures = {symbol: ltp_batcher.request(symbol, segment=segment) for symbol in symbols}
         try:
-            symbol_str = ",".join(symbols)
-            return self._client.get_ltp(symbols=symbol_str, segment=segment)
+            prices = {
+                symbol: future.result(timeout=ltp_batcher.RESULT_TIMEOUT)
+                for symbol, future in futures.items()
+            }
         except Exception as e:
             LOG.error(f"Failed to get LTP for {symbols}: {e}")
             return {}
+        return {symbol: price for symbol, price in prices.items() if price is not None}
     
     def get_quote(
         self,
@@ -108,8 +116,13 @@ class LiveDataFetcher:
         Returns:
             Current LTP or None
         """
-        result = self.get_ltp([f"NSE_{underlying}"], segment="CASH")
-        return result.get(f"NSE_{underlying}")
+        # Routed through the batcher so concurrent pollers share one request
+        symbol = f"NSE_{underlying}"
+        try:
+            return ltp_batcher.request(symbol, segment="CASH").result(timeout=ltp_batcher.RESULT_TIMEOUT)
+        except Exception as e:
+            LOG.error(f"Failed to get LTP for {symbol}: {e}")
+            return None
 
 
 # Global instance
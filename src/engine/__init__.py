@@ -1,9 +1,10 @@
-from .backtester import Backtester, BacktestResult, run_backtest
+from .backtester import Backtester, BacktestResult, TRADE_COLUMNS, run_backtest
 from .live_trader import LiveTrader, start_trading
 
 __all__ = [
     "Backtester",
     "BacktestResult",
+    "TRADE_COLUMNS",
     "run_backtest",
     "LiveTrader",
     "start_trading",
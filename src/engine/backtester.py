@@ -4,18 +4,44 @@ Simulates strategy execution over historical data with detailed logging.
 """
 
 import logging
-from typing import List, Dict, Any, Optional
-from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Iterator, Tuple
+from datetime import datetime
+import numpy as np
 import pandas as pd
 
 from ..config import settings
 from ..data import historical_fetcher, instrument_manager
-from ..strategies import BaseStrategy, MarketData, BullCallSpreadStrategy
+from ..strategies import BaseStrategy, MarketData, BullCallSpreadStrategy, OrderSide
 from ..execution import position_manager, order_manager
 from ..utils import format_currency
 
 LOG = logging.getLogger(__name__)
 
+# Column order of a trade record (keys of the dict returned by Backtester._execute_trade)
+TRADE_COLUMNS = (
+    "date",
+    "entry_time",
+    "expiry",
+    "days_to_expiry",
+    "underlying",
+    "spot_price",
+    "buy_strike",
+    "sell_strike",
+    "buy_symbol",
+    "sell_symbol",
+    "entry_buy",
+    "entry_sell",
+    "entry_net_debit",
+    "exit_buy",
+    "exit_sell",
+    "exit_net_debit",
+    "lot_size",
+    "gross_pnl",
+    "brokerage",
+    "pnl_after_brokerage",
+)
+
 
 def calculate_weekly_expiries(from_date: str, to_date: str, underlying: str = "NIFTY") -> List[str]:
     """
@@ -33,26 +59,12 @@ def calculate_weekly_expiries(from_date: str, to_date: str, underlying: str = "N
     Returns:
         List of Thursday expiry dates covering the range
     """
-    start = datetime.strptime(from_date, "%Y-%m-%d")
-    end = datetime.strptime(to_date, "%Y-%m-%d")
-    
     # Add buffer to ensure we have expiries beyond our date range
-    end_buffer = end + timedelta(days=60)
-    
-    expiries = []
-    current = start
+    end_buffer = pd.Timestamp(to_date) + pd.Timedelta(days=60)
     
-    # Find next Thursday (Thursday = weekday 3)
-    days_until_thursday = (3 - current.weekday()) % 7
-    if days_until_thursday == 0:
-        # If we're on Thursday, include it
-        pass
-    current = current + timedelta(days=days_until_thursday)
-    
-    # Generate all Thursdays (weekly expiries)
-    while current <= end_buffer:
-        expiries.append(current.strftime("%Y-%m-%d"))
-        current += timedelta(days=7)
+    # Every Thursday from the first one on/after from_date (W-THU is anchored,
+    # so a Thursday start date is included)
+    expiries = pd.date_range(from_date, end_buffer, freq="W-THU").strftime("%Y-%m-%d").tolist()
     
     LOG.info(f"📅 Calculated {len(expiries)} weekly expiries for backtest period")
     if expiries:
@@ -60,11 +72,34 @@ def calculate_weekly_expiries(from_date: str, to_date: str, underlying: str = "N
     return expiries
 
 
+# Simulated strike offsets around ATM: -500 to +500 in steps of 50
+_CHAIN_OFFSETS = tuple(i * 50 for i in range(-10, 11))
+
+
+@lru_cache(maxsize=256)
+def _expiry_code(expiry: str) -> str:
+    """Symbol form of an expiry date (e.g., "2025-01-02" -> "02Jan25")."""
+    return datetime.strptime(expiry, "%Y-%m-%d").strftime("%d%b%y")
+
+
+@lru_cache(maxsize=1024)
+def _simulated_chain(underlying: str, expiry: str, base_strike: int) -> Dict[str, List[str]]:
+    """Contract symbols for 21 strikes centred on base_strike (cached; do not mutate)."""
+    prefix = f"NSE-{underlying}-{_expiry_code(expiry)}-"
+    stems = [f"{prefix}{base_strike + offset}" for offset in _CHAIN_OFFSETS]
+    
+    calls = [stem + "-CE" for stem in stems]
+    puts = [stem + "-PE" for stem in stems]
+    
+    return {"calls": calls, "puts": puts}
+
+
 class BacktestResult:
     """Container for backtest results."""
     
     def __init__(self):
-        self.trades: List[Dict[str, Any]] = []
+        # Trades stored column-wise: one list per TRADE_COLUMNS entry
+        self._columns: Dict[str, List[Any]] = {col: [] for col in TRADE_COLUMNS}
         self.daily_pnl: Dict[str, float] = {}
         self.total_pnl: float = 0.0
         self.total_trades: int = 0
@@ -79,9 +114,29 @@ class BacktestResult:
             return 0.0
         return self.winning_trades / self.total_trades
     
+    def add_trade(self, trade: Dict[str, Any]) -> None:
+        """Append one trade record (a dict with the TRADE_COLUMNS keys)."""
+        for col, values in self._columns.items():
+            values.append(trade[col])
+    
+    def column(self, name: str) -> List[Any]:
+        """One trade field for every trade, in trade order (do not mutate)."""
+        return self._columns[name]
+    
+    @property
+    def trades(self) -> List[Dict[str, Any]]:
+        """Trade records as dicts, built on demand from the columns."""
+        return [dict(zip(TRADE_COLUMNS, row)) for row in self.iter_trade_rows()]
+    
     def to_dataframe(self) -> pd.DataFrame:
         """Convert trades to DataFrame."""
-        return pd.DataFrame(self.trades)
+        if not self._columns["date"]:
+            return pd.DataFrame()
+        return pd.DataFrame(self._columns)
+    
+    def iter_trade_rows(self) -> Iterator[Tuple[Any, ...]]:
+        """Yield each trade as a tuple ordered by TRADE_COLUMNS."""
+        return zip(*self._columns.values())
     
     def summary(self) -> str:
         """Generate summary string."""
@@ -115,6 +170,13 @@ class Backtester:
         self.use_calculated_expiries = use_calculated_expiries
         self._historical = historical_fetcher
         self._instruments = instrument_manager
+        # Option chains seen during the current run, keyed by (underlying, expiry)
+        self._chain_cache: Dict[Tuple[str, str], Dict[str, List[str]]] = {}
+        # Spot closes for the current run, keyed by date
+        self._spot_prices: Dict[str, float] = {}
+        # Brokerage per spread open/close (two orders) and per round trip
+        self._spread_brokerage = settings.brokerage_per_order * 2
+        self._round_trip_brokerage = settings.brokerage_per_order * 4
     
     def run(
         self,
@@ -136,6 +198,7 @@ class Backtester:
         result = BacktestResult()
         position_manager.clear()
         order_manager.clear_orders()
+        self._chain_cache.clear()
         
         LOG.info("=" * 80)
         LOG.info("BACKTEST STARTED")
@@ -151,11 +214,6 @@ class Backtester:
         LOG.info(f"Slippage: {self.slippage} points")
         LOG.info("=" * 80)
         
-        # Parse dates
-        start = datetime.strptime(from_date, "%Y-%m-%d")
-        end = datetime.strptime(to_date, "%Y-%m-%d")
-        current = start
-        
         # Get expiries
         # For historical backtesting, we CALCULATE expiries based on the trading dates
         # because the API only returns future expiries from today, not historical ones
@@ -177,32 +235,65 @@ class Backtester:
         LOG.info(f"📅 Found {len(expiries)} expiry dates")
         LOG.info(f"   First 5 expiries: {expiries[:5]}")
         
-        while current <= end:
-            date_str = current.strftime("%Y-%m-%d")
-            
-            # Skip weekends
-            if current.weekday() >= 5:
-                LOG.debug(f"⏭️  {date_str}: Weekend - Skipping")
-                current += timedelta(days=1)
-                continue
-            
-            LOG.info("-" * 80)
-            LOG.info(f"📆 PROCESSING DATE: {date_str}")
-            LOG.info("-" * 80)
+        # Parsed once so each day's nearest-expiry lookup is a binary search
+        expiry_days = pd.to_datetime(expiries).to_numpy().astype("datetime64[D]")
+        order = np.argsort(expiry_days, kind="stable")
+        expiries = [expiries[i] for i in order]
+        expiry_days = expiry_days[order]
+        
+        # Weekdays only; weekends never enter the loop. Each day is kept both
+        # as its string key and as datetime64[D] so nothing is re-parsed later
+        business_days = pd.bdate_range(from_date, to_date)
+        trading_days = business_days.strftime("%Y-%m-%d").tolist()
+        trading_dates = business_days.to_numpy().astype("datetime64[D]")
+        # Entry timestamps by offsetting each midnight by ENTRY_TIME once
+        entry_times = (business_days + pd.Timedelta(f"{settings.entry_time}:00")).to_pydatetime()
+        
+        # Spot closes for the whole range in a few bulk requests
+        LOG.info(f"📊 Fetching spot prices for {underlying}...")
+        self._spot_prices = self._historical.get_spot_prices(underlying, trading_days)
+        
+        # Every expiry some trading day will select, fetched concurrently
+        # (days are otherwise processed in order: the strategy is stateful)
+        first_future = np.searchsorted(expiry_days, trading_dates, side="right")
+        needed = [expiries[i] for i in np.unique(first_future) if i < len(expiries)]
+        if needed:
+            LOG.info(f"📋 Fetching option chains for {len(needed)} expiries...")
+            for expiry, chain in self._historical.get_option_chains(underlying, needed).items():
+                self._chain_cache[(underlying, expiry)] = chain
+        
+        # Pass 1: strategy decisions, one day at a time
+        entries: List[Dict[str, Any]] = []
+        for date_str, trading_date, entry_time in zip(trading_days, trading_dates, entry_times):
+            LOG.debug("-" * 80)
+            LOG.debug("📆 PROCESSING DATE: %s", date_str)
+            LOG.debug("-" * 80)
             
             try:
-                trade_result = self._run_day(underlying, date_str, expiries)
-                if trade_result:
-                    result.trades.append(trade_result)
-                    result.daily_pnl[date_str] = trade_result["pnl_after_brokerage"]
-                    LOG.info(f"✅ Trade completed: P&L = {format_currency(trade_result['pnl_after_brokerage'])}")
+                entry = self._plan_day(
+                    underlying, date_str, trading_date, entry_time, expiries, expiry_days
+                )
+                if entry:
+                    entries.append(entry)
                 else:
-                    LOG.info(f"⚠️  No trade executed on {date_str}")
+                    LOG.debug("⚠️  No trade executed on %s", date_str)
                     
             except Exception as e:
                 LOG.error(f"❌ Error on {date_str}: {e}", exc_info=True)
-            
-            current += timedelta(days=1)
+        
+        # Pass 2: simulated fills for every entry at once
+        priced = self._price_entries(entries)
+        
+        # Pass 3: position bookkeeping, in date order
+        for entry, fills in priced:
+            date_str = entry["date"]
+            try:
+                trade_result = self._execute_trade(entry, fills)
+                result.add_trade(trade_result)
+                result.daily_pnl[date_str] = trade_result["pnl_after_brokerage"]
+                LOG.info(f"✅ Trade completed: P&L = {format_currency(trade_result['pnl_after_brokerage'])}")
+            except Exception as e:
+                LOG.error(f"❌ Error on {date_str}: {e}", exc_info=True)
         
         # Calculate statistics
         self._calculate_stats(result)
@@ -211,68 +302,75 @@ class Backtester:
         LOG.info(result.summary())
         return result
     
-    def _find_nearest_expiry(self, expiries: List[str], current_date: str) -> Optional[str]:
+    def _find_nearest_expiry(
+        self,
+        expiries: List[str],
+        expiry_days: np.ndarray,
+        current: np.datetime64
+    ) -> Tuple[Optional[str], int]:
         """
-        Find the NEAREST expiry that is in the future (relative to current_date).
-        Prefers expiries within 7 days for weekly trading.
+        Find the NEAREST expiry that is in the future (relative to current).
         
         Args:
-            expiries: List of available expiry dates
-            current_date: Current trading date
+            expiries: Available expiry dates, sorted ascending
+            expiry_days: The same expiries as datetime64[D]
+            current: Current trading date as datetime64[D]
             
         Returns:
-            Nearest expiry date or None
+            (nearest expiry date, days to it), or (None, 0) if none remain
         """
-        current = pd.Timestamp(current_date)
-        
-        # Filter future expiries only
-        future_expiries = []
-        for exp in expiries:
-            exp_date = pd.Timestamp(exp)
-            days_to_expiry = (exp_date - current).days
-            
-            # Only consider expiries that are AFTER the current trading date
-            if days_to_expiry > 0:
-                future_expiries.append((exp, days_to_expiry))
-        
-        if not future_expiries:
-            return None
-        
-        # Sort by days to expiry and return the nearest
-        future_expiries.sort(key=lambda x: x[1])
-        nearest = future_expiries[0]
-        
-        LOG.info(f"📅 Selected expiry: {nearest[0]} ({nearest[1]} days away)")
-        return nearest[0]
+        # Only expiries AFTER the current trading date qualify
+        idx = int(np.searchsorted(expiry_days, current, side="right"))
+        if idx == len(expiries):
+            return None, 0
+        
+        nearest = expiries[idx]
+        days_to_expiry = int((expiry_days[idx] - current).astype(int))
+        LOG.debug("📅 Selected expiry: %s (%d days away)", nearest, days_to_expiry)
+        return nearest, days_to_expiry
     
-    def _run_day(
+    def _plan_day(
         self,
         underlying: str,
         date_str: str,
-        expiries: List[str]
+        trading_date: np.datetime64,
+        entry_time: datetime,
+        expiries: List[str],
+        expiry_days: np.ndarray
     ) -> Optional[Dict[str, Any]]:
-        """Run backtest for a single day with detailed logging."""
+        """
+        Decide a single day's trade with detailed logging.
+        
+        Returns:
+            The entry (date, expiry, spot, strikes and leg symbols) or None
+        """
+        strategy = self.strategy
         
         # Find nearest expiry (from calculated expiries)
-        nearest_expiry = self._find_nearest_expiry(expiries, date_str)
+        nearest_expiry, days_to_exp = self._find_nearest_expiry(expiries, expiry_days, trading_date)
         
         if not nearest_expiry:
             LOG.warning(f"⚠️  No future expiries available for {date_str}")
             return None
         
-        # Get spot price
-        LOG.info(f"📊 Fetching spot price for {underlying}...")
-        spot_price = self._historical.get_spot_price(underlying, date_str)
+        # Get spot price (prefetched by run())
+        spot_price = self._spot_prices.get(date_str)
         
         if not spot_price:
             LOG.warning(f"⚠️  Could not fetch spot price for {date_str}")
             return None
         
-        LOG.info(f"📊 {underlying} Spot Price: {spot_price:.2f}")
+        LOG.debug("📊 %s Spot Price: %.2f", underlying, spot_price)
         
         # Get option chain - use the calculated expiry
-        LOG.info(f"📋 Fetching option chain for expiry: {nearest_expiry}...")
-        option_chain = self._historical.get_option_chain(underlying, nearest_expiry)
+        # The ~5 trading days before an expiry share its chain; run() prefetches
+        # them all, so this only fetches on a cache miss
+        chain_key = (underlying, nearest_expiry)
+        option_chain = self._chain_cache.get(chain_key)
+        if option_chain is None:
+            LOG.debug("📋 Fetching option chain for expiry: %s...", nearest_expiry)
+            option_chain = self._historical.get_option_chain(underlying, nearest_expiry)
+            self._chain_cache[chain_key] = option_chain
         
         if not option_chain.get("calls"):
             # For historical dates, option chain might not be available
@@ -280,16 +378,13 @@ class Backtester:
             LOG.warning(f"⚠️  No option chain from API, simulating contracts...")
             option_chain = self._simulate_option_chain(underlying, nearest_expiry, spot_price)
         
-        num_calls = len(option_chain.get("calls", []))
-        num_puts = len(option_chain.get("puts", []))
-        LOG.info(f"📋 Option chain: {num_calls} calls, {num_puts} puts")
+        if LOG.isEnabledFor(logging.DEBUG):
+            LOG.debug(
+                "📋 Option chain: %d calls, %d puts",
+                len(option_chain["calls"]), len(option_chain["puts"])
+            )
         
         # Create market data
-        entry_time = datetime.strptime(
-            f"{date_str} {settings.entry_time}:00",
-            "%Y-%m-%d %H:%M:%S"
-        )
-        
         market_data = MarketData(
             underlying=underlying,
             spot_price=spot_price,
@@ -300,132 +395,220 @@ class Backtester:
         )
         
         # Check entry conditions
-        LOG.info(f"🔍 Checking entry conditions at {settings.entry_time}...")
+        LOG.debug("🔍 Checking entry conditions at %s...", settings.entry_time)
         
-        if not self.strategy.should_enter(market_data):
-            LOG.info(f"❌ Entry conditions not met")
+        if not strategy.should_enter(market_data):
+            LOG.debug("❌ Entry conditions not met")
             return None
         
-        LOG.info(f"✅ Entry conditions met!")
+        LOG.debug("✅ Entry conditions met!")
         
         # Get entry orders
-        entry_orders = self.strategy.get_entry_orders(market_data)
+        entry_orders = strategy.get_entry_orders(market_data)
         if len(entry_orders) < 2:
             LOG.warning(f"⚠️  Insufficient entry orders generated: {len(entry_orders)}")
             return None
         
         # Get strike details
-        buy_strike = self.strategy.buy_strike
-        sell_strike = self.strategy.sell_strike
+        buy_strike = strategy.buy_strike
+        sell_strike = strategy.sell_strike
         
-        LOG.info(f"📍 ATM Strike determined: {buy_strike}")
-        LOG.info(f"📍 OTM Strike (ATM + {self.strategy.spread_width}): {sell_strike}")
+        LOG.debug("📍 ATM Strike determined: %s", buy_strike)
+        LOG.debug("📍 OTM Strike (ATM + %s): %s", strategy.spread_width, sell_strike)
         
         # Extract symbols
-        buy_order = next((o for o in entry_orders if o.side.value == "BUY"), None)
-        sell_order = next((o for o in entry_orders if o.side.value == "SELL"), None)
+        # First order per side (reversed so earlier orders win)
+        by_side = {o.side: o for o in reversed(entry_orders)}
+        buy_order = by_side.get(OrderSide.BUY)
+        sell_order = by_side.get(OrderSide.SELL)
         
         if not buy_order or not sell_order:
             LOG.error("❌ Could not find buy/sell orders")
             return None
         
-        LOG.info(f"📝 Buy leg: {buy_order.symbol}")
-        LOG.info(f"📝 Sell leg: {sell_order.symbol}")
+        LOG.debug("📝 Buy leg: %s", buy_order.symbol)
+        LOG.debug("📝 Sell leg: %s", sell_order.symbol)
+        
+        return {
+            "date": date_str,
+            "entry_time": entry_time,
+            "expiry": nearest_expiry,
+            "days_to_expiry": days_to_exp,
+            "underlying": underlying,
+            "spot_price": spot_price,
+            "buy_strike": buy_strike,
+            "sell_strike": sell_strike,
+            "buy_symbol": buy_order.symbol,
+            "sell_symbol": sell_order.symbol,
+        }
+    
+    def _price_entries(
+        self, entries: List[Dict[str, Any]]
+    ) -> List[Tuple[Dict[str, Any], Dict[str, float]]]:
+        """
+        Pair each entry with its simulated fills.
+        
+        All entries are priced in one vectorized pass. If any of them cannot
+        be priced, falls back to one entry at a time so only the bad ones are
+        dropped (and logged), as pass 1 and pass 3 do per day.
+        """
+        try:
+            prices = self._simulate_prices(entries)
+        except Exception as e:
+            LOG.warning(f"⚠️  Batch pricing failed ({e}); pricing entries one by one")
+        else:
+            return [
+                (entry, {name: column[i] for name, column in prices.items()})
+                for i, entry in enumerate(entries)
+            ]
+        
+        priced = []
+        for entry in entries:
+            try:
+                fills = self._simulate_prices([entry])
+            except Exception as e:
+                LOG.error(f"❌ Error on {entry.get('date')}: {e}", exc_info=True)
+                continue
+            priced.append((entry, {name: column[0] for name, column in fills.items()}))
+        return priced
+    
+    def _simulate_prices(self, entries: List[Dict[str, Any]]) -> Dict[str, List[float]]:
+        """
+        Theoretical entry/exit fills for all entries in one vectorized pass.
+        
+        Option prices are intrinsic value plus a simplified time value; exits
+        assume 5% intraday decay. Element-wise float64 ufuncs give exactly
+        the values the equivalent scalar arithmetic would.
+        
+        Returns:
+            Column name -> list of floats, aligned with `entries`
+        """
+        count = len(entries)
+        spot = np.fromiter((e["spot_price"] for e in entries), dtype=np.float64, count=count)
+        buy_strike = np.fromiter((e["buy_strike"] for e in entries), dtype=np.float64, count=count)
+        sell_strike = np.fromiter((e["sell_strike"] for e in entries), dtype=np.float64, count=count)
+        days_to_exp = np.fromiter((e["days_to_expiry"] for e in entries), dtype=np.float64, count=count)
+        
+        # fromiter turns None into NaN; refuse it rather than price garbage
+        if not np.isfinite([spot, buy_strike, sell_strike, days_to_exp]).all():
+            raise ValueError("entry has a missing or non-numeric spot, strike or expiry")
         
         # Calculate simulated prices based on intrinsic value + time value
-        buy_intrinsic = max(0, spot_price - buy_strike)
-        sell_intrinsic = max(0, spot_price - sell_strike)
+        buy_intrinsic = np.maximum(0.0, spot - buy_strike)
+        sell_intrinsic = np.maximum(0.0, spot - sell_strike)
         
         # Add time value (simplified approximation)
-        days_to_exp = (pd.Timestamp(nearest_expiry) - pd.Timestamp(date_str)).days
-        time_value_factor = max(0.01, days_to_exp / 30.0) * 0.02
-        
-        time_value_buy = max(10, abs(spot_price - buy_strike) * time_value_factor)
-        time_value_sell = max(5, abs(spot_price - sell_strike) * time_value_factor * 0.5)
+        time_value_factor = np.maximum(0.01, days_to_exp / 30.0) * 0.02
+        time_value_buy = np.maximum(10.0, np.abs(spot - buy_strike) * time_value_factor)
+        time_value_sell = np.maximum(5.0, np.abs(spot - sell_strike) * time_value_factor * 0.5)
         
         buy_price = buy_intrinsic + time_value_buy
         sell_price = sell_intrinsic + time_value_sell
         
-        LOG.info(f"💰 ENTRY PRICE CALCULATION:")
-        LOG.info(f"   Days to expiry: {days_to_exp}")
-        LOG.info(f"   Buy leg ({buy_strike}CE):")
-        LOG.info(f"     - Intrinsic: {buy_intrinsic:.2f}")
-        LOG.info(f"     - Time value: {time_value_buy:.2f}")
-        LOG.info(f"     - Theoretical: {buy_price:.2f}")
-        LOG.info(f"   Sell leg ({sell_strike}CE):")
-        LOG.info(f"     - Intrinsic: {sell_intrinsic:.2f}")
-        LOG.info(f"     - Time value: {time_value_sell:.2f}")
-        LOG.info(f"     - Theoretical: {sell_price:.2f}")
-        
-        # Apply slippage
-        entry_buy = buy_price + self.slippage
-        entry_sell = sell_price - self.slippage
+        # Simulate price movement (5% time decay for intraday)
+        time_decay_factor = 0.95
+        
+        columns = {
+            "buy_intrinsic": buy_intrinsic,
+            "sell_intrinsic": sell_intrinsic,
+            "time_value_buy": time_value_buy,
+            "time_value_sell": time_value_sell,
+            "buy_price": buy_price,
+            "sell_price": sell_price,
+            # Apply slippage
+            "entry_buy": buy_price + self.slippage,
+            "entry_sell": sell_price - self.slippage,
+            "exit_buy": buy_price * time_decay_factor,
+            "exit_sell": sell_price * time_decay_factor,
+        }
+        return {name: column.tolist() for name, column in columns.items()}
+    
+    def _execute_trade(self, entry: Dict[str, Any], fills: Dict[str, float]) -> Dict[str, Any]:
+        """Open and close one simulated spread and build its trade record."""
+        underlying = entry["underlying"]
+        buy_strike = entry["buy_strike"]
+        sell_strike = entry["sell_strike"]
+        entry_buy = fills["entry_buy"]
+        entry_sell = fills["entry_sell"]
+        exit_buy = fills["exit_buy"]
+        exit_sell = fills["exit_sell"]
         net_debit = entry_buy - entry_sell
         
-        LOG.info(f"💰 AFTER SLIPPAGE ({self.slippage} pts):")
-        LOG.info(f"   Buy filled at: {entry_buy:.2f}")
-        LOG.info(f"   Sell filled at: {entry_sell:.2f}")
-        LOG.info(f"   Net Debit: {net_debit:.2f}")
+        # The per-trade breakdown is only formatted when DEBUG is on
+        verbose = LOG.isEnabledFor(logging.DEBUG)
+        
+        if verbose:
+            LOG.debug(f"💰 ENTRY PRICE CALCULATION ({entry['date']}):")
+            LOG.debug(f"   Days to expiry: {entry['days_to_expiry']}")
+            LOG.debug(f"   Buy leg ({buy_strike}CE):")
+            LOG.debug(f"     - Intrinsic: {fills['buy_intrinsic']:.2f}")
+            LOG.debug(f"     - Time value: {fills['time_value_buy']:.2f}")
+            LOG.debug(f"     - Theoretical: {fills['buy_price']:.2f}")
+            LOG.debug(f"   Sell leg ({sell_strike}CE):")
+            LOG.debug(f"     - Intrinsic: {fills['sell_intrinsic']:.2f}")
+            LOG.debug(f"     - Time value: {fills['time_value_sell']:.2f}")
+            LOG.debug(f"     - Theoretical: {fills['sell_price']:.2f}")
+        
+            LOG.debug(f"💰 AFTER SLIPPAGE ({self.slippage} pts):")
+            LOG.debug(f"   Buy filled at: {entry_buy:.2f}")
+            LOG.debug(f"   Sell filled at: {entry_sell:.2f}")
+            LOG.debug(f"   Net Debit: {net_debit:.2f}")
         
         lot_size = self._instruments.get_lot_size(underlying)
-        LOG.info(f"📦 Lot size: {lot_size}")
+        LOG.debug("📦 Lot size: %s", lot_size)
         
         # Open position
         spread = position_manager.open_spread(
             underlying=underlying,
             strategy_name=self.strategy.name,
-            long_symbol=buy_order.symbol,
-            short_symbol=sell_order.symbol,
+            long_symbol=entry["buy_symbol"],
+            short_symbol=entry["sell_symbol"],
             long_price=entry_buy,
             short_price=entry_sell,
             quantity=1,
             lot_size=lot_size,
-            brokerage=settings.brokerage_per_order * 2
+            brokerage=self._spread_brokerage
         )
         
-        LOG.info(f"📈 POSITION OPENED: {spread.spread_id}")
-        LOG.info(f"   Entry cost: {format_currency(spread.total_cost)}")
-        
-        # Simulate exit at EXIT_TIME
-        LOG.info(f"⏰ Simulating exit at {settings.exit_time}...")
-        
-        # Simulate price movement (5% time decay for intraday)
-        time_decay_factor = 0.95
-        exit_buy = buy_price * time_decay_factor
-        exit_sell = sell_price * time_decay_factor
+        if verbose:
+            LOG.debug(f"📈 POSITION OPENED: {spread.spread_id}")
+            LOG.debug(f"   Entry cost: {format_currency(spread.total_cost)}")
         
-        LOG.info(f"💰 EXIT PRICE CALCULATION (5% time decay):")
-        LOG.info(f"   Buy leg exit: {exit_buy:.2f}")
-        LOG.info(f"   Sell leg exit: {exit_sell:.2f}")
-        LOG.info(f"   Exit Net: {exit_buy - exit_sell:.2f}")
+            # Simulate exit at EXIT_TIME
+            LOG.debug(f"⏰ Simulating exit at {settings.exit_time}...")
+            LOG.debug(f"💰 EXIT PRICE CALCULATION (5% time decay):")
+            LOG.debug(f"   Buy leg exit: {exit_buy:.2f}")
+            LOG.debug(f"   Sell leg exit: {exit_sell:.2f}")
+            LOG.debug(f"   Exit Net: {exit_buy - exit_sell:.2f}")
         
         # Close position
         pnl = position_manager.close_spread(
             spread_id=spread.spread_id,
             exit_long=exit_buy,
             exit_short=exit_sell,
-            brokerage=settings.brokerage_per_order * 2
+            brokerage=self._spread_brokerage
         )
         
-        total_brokerage = settings.brokerage_per_order * 4
+        total_brokerage = self._round_trip_brokerage
         gross_pnl = pnl + total_brokerage
         
-        LOG.info(f"📉 POSITION CLOSED:")
-        LOG.info(f"   Gross P&L: {format_currency(gross_pnl)}")
-        LOG.info(f"   Brokerage: {format_currency(total_brokerage)}")
-        LOG.info(f"   Net P&L: {format_currency(pnl)}")
+        if verbose:
+            LOG.debug(f"📉 POSITION CLOSED:")
+            LOG.debug(f"   Gross P&L: {format_currency(gross_pnl)}")
+            LOG.debug(f"   Brokerage: {format_currency(total_brokerage)}")
+            LOG.debug(f"   Net P&L: {format_currency(pnl)}")
         
         return {
-            "date": date_str,
-            "entry_time": entry_time,
-            "expiry": nearest_expiry,
-            "days_to_expiry": days_to_exp,
+            "date": entry["date"],
+            "entry_time": entry["entry_time"],
+            "expiry": entry["expiry"],
+            "days_to_expiry": entry["days_to_expiry"],
             "underlying": underlying,
-            "spot_price": spot_price,
+            "spot_price": entry["spot_price"],
             "buy_strike": buy_strike,
             "sell_strike": sell_strike,
-            "buy_symbol": buy_order.symbol if buy_order else "",
-            "sell_symbol": sell_order.symbol if sell_order else "",
+            "buy_symbol": entry["buy_symbol"],
+            "sell_symbol": entry["sell_symbol"],
             "entry_buy": entry_buy,
             "entry_sell": entry_sell,
             "entry_net_debit": net_debit,
@@ -450,42 +633,25 @@ class Backtester:
         """
         # Round spot to nearest 50
         base_strike = round(spot_price / 50) * 50
-        
-        # Generate strikes from -500 to +500 around ATM
-        strikes = [base_strike + (i * 50) for i in range(-10, 11)]
-        
-        # Format expiry for symbol (e.g., "2025-01-02" -> "02Jan25")
-        exp_date = datetime.strptime(expiry, "%Y-%m-%d")
-        exp_str = exp_date.strftime("%d%b%y")
-        
-        calls = [f"NSE-{underlying}-{exp_str}-{strike}-CE" for strike in strikes]
-        puts = [f"NSE-{underlying}-{exp_str}-{strike}-PE" for strike in strikes]
-        
-        return {"calls": calls, "puts": puts}
+        return _simulated_chain(underlying, expiry, base_strike)
     
     def _calculate_stats(self, result: BacktestResult) -> None:
         """Calculate backtest statistics."""
-        if not result.trades:
+        pnl = np.asarray(result.column("pnl_after_brokerage"), dtype=np.float64)
+        if not pnl.size:
             return
         
-        result.total_trades = len(result.trades)
-        result.total_pnl = sum(t["pnl_after_brokerage"] for t in result.trades)
+        # cumsum adds left to right, so the total matches a plain running sum
+        cumulative = np.cumsum(pnl)
         
-        result.winning_trades = sum(
-            1 for t in result.trades if t["pnl_after_brokerage"] > 0
-        )
-        result.losing_trades = sum(
-            1 for t in result.trades if t["pnl_after_brokerage"] < 0
-        )
+        result.total_trades = len(pnl)
+        result.total_pnl = float(cumulative[-1])
+        result.winning_trades = int(np.count_nonzero(pnl > 0))
+        result.losing_trades = int(np.count_nonzero(pnl < 0))
         
-        # Calculate max drawdown
-        cumulative = 0.0
-        peak = 0.0
-        for trade in result.trades:
-            cumulative += trade["pnl_after_brokerage"]
-            peak = max(peak, cumulative)
-            drawdown = peak - cumulative
-            result.max_drawdown = max(result.max_drawdown, drawdown)
+        # Max drawdown from the running equity peak (starting at zero)
+        peak = np.maximum.accumulate(np.maximum(cumulative, 0.0))
+        result.max_drawdown = max(result.max_drawdown, float((peak - cumulative).max()))
 
 
 # Convenience function
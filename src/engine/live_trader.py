@@ -3,28 +3,44 @@ Live trading engine.
 Executes strategies in real-time with paper or live mode.
 """
 
+import bisect
 import logging
-import time
-import schedule
-from typing import Optional
+import threading
+from typing import Optional, Dict, Any, Tuple
 from datetime import datetime
 
 from ..config import settings
 from ..api import client, stream_manager
 from ..data import live_fetcher, historical_fetcher, instrument_manager
-from ..strategies import BaseStrategy, MarketData, BullCallSpreadStrategy
+from ..strategies import BaseStrategy, MarketData, BullCallSpreadStrategy, OrderSide
 from ..execution import order_manager, position_manager
-from ..utils import is_market_open, get_next_market_open, format_currency
+from ..utils import is_market_open, get_next_market_open, format_currency, parse_time
 
 LOG = logging.getLogger(__name__)
 
 
+def _simulated_leg_prices(spot: float, buy_strike: float, sell_strike: float) -> Tuple[float, float]:
+    """Paper-mode stand-in LTPs for the long and short legs before their first tick."""
+    return max(10, spot - buy_strike) + 20, max(5, spot - sell_strike) + 10
+
+
 class LiveTrader:
     """
     Live trading engine that executes strategies in real-time.
     Supports both paper and live trading modes.
+    
+    The trading loop runs on its own daemon thread; UIs only read state
+    through ui_snapshot() and the position manager.
     """
     
+    # Longest wait between trading checks while ticks are flowing; the loop
+    # also wakes on every tick and exactly at entry/exit times
+    HEARTBEAT_INTERVAL = 5.0
+    # Wait used instead while the stream is down or quiet, when checks poll REST
+    POLL_INTERVAL = 1.0
+    # How long stop() waits for an in-flight trading check before closing positions
+    STOP_JOIN_TIMEOUT = 10.0
+    
     def __init__(
         self,
         strategy: Optional[BaseStrategy] = None,
@@ -36,45 +52,133 @@ class LiveTrader:
         self.underlying = underlying or settings.underlying
         self._running = False
         self._client = client
+        # Bumped whenever a fill or exit changes the book, so UIs can skip redraws
+        self.state_version = 0
+        # Set once the stream is connected and subscribed (start() may run in a thread)
+        self.ready = False
+        # Serializes trading steps between the loop thread and UI-driven calls
+        self._step_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        # Orders start()/stop() so a stop() racing a background start wins
+        self._lifecycle_lock = threading.Lock()
+        # Set by stream tick callbacks (and stop()) to wake the trading loop
+        self._wake = threading.Event()
+        # Entry/exit times of day as (hour, minute), parsed once
+        self._boundaries = (parse_time(settings.entry_time), parse_time(settings.exit_time))
+        self._thread: Optional[threading.Thread] = None
+        # Latest loop state for read-only consumers (see ui_snapshot)
+        self._ui_lock = threading.Lock()
+        self._ui_snapshot: Dict[str, Any] = {}
+        
+    def start(self, block: bool = True) -> None:
+        """
+        Start the live trading engine.
         
-    def start(self) -> None:
-        """Start the live trading engine."""
-        LOG.info(f"Starting live trader in {self.mode} mode")
-        self._running = True
+        Args:
+            block: Wait for the trading loop to finish (CLI). Pass False to
+                return at once (UI); connecting and starting the loop then
+                happen on a background thread, and a stop() issued meanwhile
+                cancels them.
+        """
+        with self._lifecycle_lock:
+            if self._running:
+                LOG.warning("Live trader already running")
+                return
+            
+            LOG.info(f"Starting live trader in {self.mode} mode")
+            self._running = True
+            self._stop_event.clear()
+        
+        if not block:
+            threading.Thread(target=self._launch, name="LiveTraderStart", daemon=True).start()
+            return
         
+        self._launch()
+        try:
+            while self._thread and self._thread.is_alive():
+                self._thread.join(timeout=0.5)
+        except KeyboardInterrupt:
+            LOG.info("Received shutdown signal")
+            self.stop()
+    
+    def _launch(self) -> None:
+        """Connect the stream and start the loop thread, unless stop() got there first."""
         # Connect to stream
         LOG.info("🔌 Connecting to data stream...")
         stream_manager.connect()
         
-        # Subscribe to underlying
-        # Note: We need to know the correct symbol format for subscription
-        # For now assuming "NSE:NIFTY" or similar based on API
-        # Or just passing the underlying name if the manager handles formatting
-        stream_manager.subscribe([f"NSE_{self.underlying}"])
-        
-        # Schedule entry and exit checks
-        schedule.every().second.do(self.check_trading_window)
+        # Subscribe to underlying (resolved to a feed instrument by the stream manager)
+        stream_manager.subscribe([f"NSE_{self.underlying}"], callback=self._on_tick)
         
         LOG.info(f"Strategy: {self.strategy.name}")
         LOG.info(f"Underlying: {self.underlying}")
         LOG.info(f"Entry Time: {settings.entry_time}")
         LOG.info(f"Exit Time: {settings.exit_time}")
         
-        try:
-            while self._running:
-                self.run_step()
-                time.sleep(1)
-        except KeyboardInterrupt:
-            LOG.info("Received shutdown signal")
-            self.stop()
-
-    def run_step(self) -> None:
-        """Run a single iteration of the trading loop."""
-        schedule.run_pending()
+        with self._lifecycle_lock:
+            if self._stop_event.is_set():
+                # stop() ran while we were connecting; it may have disconnected too early
+                LOG.info("Live trader stopped before the trading loop started")
+                stream_manager.disconnect()
+                return
+            self._thread = threading.Thread(target=self._run_loop, name="LiveTraderLoop", daemon=True)
+            self._thread.start()
+            self.ready = True
+    
+    def _on_tick(self, symbol: str, ltp: float) -> None:
+        """Stream callback: wake the trading loop for a fresh check."""
+        self._wake.set()
+    
+    def _run_loop(self) -> None:
+        """
+        Trading loop: check the trading window whenever a tick arrives.
+        
+        The wait is capped at the next entry/exit time so boundaries fire on
+        time, at HEARTBEAT_INTERVAL while ticks are flowing, and at
+        POLL_INTERVAL while the stream is disconnected or has gone quiet.
+        Ticks that land during a check coalesce into one follow-up check.
+        """
+        while not self._stop_event.is_set():
+            try:
+                self.check_trading_window()
+            except Exception as e:
+                LOG.error(f"Trading loop error: {e}", exc_info=True)
+            
+            if stream_manager.is_streaming(self.HEARTBEAT_INTERVAL):
+                timeout = self.HEARTBEAT_INTERVAL
+            else:
+                timeout = self.POLL_INTERVAL
+            boundary = self._seconds_to_boundary(datetime.now())
+            if boundary is not None:
+                timeout = min(timeout, boundary)
+            
+            self._wake.wait(timeout)
+            self._wake.clear()
+    
+    def _seconds_to_boundary(self, now: datetime) -> Optional[float]:
+        """Seconds until today's next entry or exit time, or None if both passed."""
+        waits = []
+        for hour, minute in self._boundaries:
+            boundary = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+            delta = (boundary - now).total_seconds()
+            if delta > 0:
+                waits.append(delta)
+        return min(waits) if waits else None
     
     def stop(self) -> None:
-        """Stop the trading engine."""
-        self._running = False
+        """Stop the trading engine (also cancels a start() still connecting)."""
+        with self._lifecycle_lock:
+            self._running = False
+            self.ready = False
+            self._stop_event.set()
+            self._wake.set()
+            thread = self._thread
+        
+        # Let a check that is mid-exit finish before force-closing the same spreads
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=self.STOP_JOIN_TIMEOUT)
+            if thread.is_alive():
+                LOG.warning("Trading loop still busy after stop; closing positions anyway")
         LOG.info("Live trader stopped")
         
         # Disconnect stream
@@ -92,8 +196,23 @@ class LiveTrader:
         stats = position_manager.get_stats()
         LOG.info(f"Session Summary: {stats}")
     
+    def ui_snapshot(self) -> Dict[str, Any]:
+        """Copy of the latest loop state (last check time, spot, expiry)."""
+        with self._ui_lock:
+            return dict(self._ui_snapshot)
+    
     def check_trading_window(self) -> None:
         """Check if we should enter or exit trades."""
+        # Skip if another thread is already mid-step
+        if not self._step_lock.acquire(blocking=False):
+            return
+        try:
+            self._check_trading_window()
+        finally:
+            self._step_lock.release()
+    
+    def _check_trading_window(self) -> None:
+        """Run one trading step; caller holds the step lock."""
         now = datetime.now()
         
         if not is_market_open(now):
@@ -101,24 +220,34 @@ class LiveTrader:
         
         # Get current market data
         market_data = self._get_market_data(now)
+        with self._ui_lock:
+            self._ui_snapshot = {
+                "last_check": now,
+                "spot_price": market_data.spot_price if market_data else None,
+                "expiry": market_data.current_expiry if market_data else None,
+            }
         if not market_data:
             return
             
-        # Update MTM for open positions
-        for position in position_manager.get_open_positions():
-            # Get latest prices from stream
-            long_ltp = stream_manager.get_latest_ltp(position.long_symbol)
-            short_ltp = stream_manager.get_latest_ltp(position.short_symbol)
-            
-            if long_ltp:
-                position.current_long_price = long_ltp
-            if short_ltp:
-                position.current_short_price = short_ltp
+        # Update MTM for open positions from one batched stream read
+        open_positions = position_manager.get_open_positions()
+        if open_positions:
+            legs = [symbol for p in open_positions for symbol in (p.long_symbol, p.short_symbol)]
+            prices = stream_manager.get_latest_ltps(legs).reshape(-1, 2).tolist()
+            for position, (long_ltp, short_ltp) in zip(open_positions, prices):
+                # NaN means no tick yet; keep the last known price
+                if long_ltp > 0:
+                    position.current_long_price = long_ltp
+                if short_ltp > 0:
+                    position.current_short_price = short_ltp
 
         # Check for entry
-        if not position_manager.has_open_positions():
+        if not open_positions:
             if self.strategy.should_enter(market_data):
                 self._execute_entry(market_data)
+            # Nothing to exit unless the entry just opened a position
+            if not position_manager.has_open_positions():
+                return
         
         # Check for exit
         for position in position_manager.get_open_positions():
@@ -146,13 +275,13 @@ class LiveTrader:
             if not expiries:
                 return None
             
-            # Find nearest expiry
+            # Find nearest expiry (expiries are sorted YYYY-MM-DD strings)
             today = timestamp.strftime("%Y-%m-%d")
-            future_expiries = [e for e in expiries if e > today]
-            if not future_expiries:
+            idx = bisect.bisect_right(expiries, today)
+            if idx == len(expiries):
                 return None
             
-            nearest_expiry = min(future_expiries)
+            nearest_expiry = expiries[idx]
             
             # Get option chain
             option_chain = historical_fetcher.get_option_chain(underlying, nearest_expiry)
@@ -183,39 +312,31 @@ class LiveTrader:
         records = order_manager.place_orders(orders, slippage=settings.slippage_points)
         
         # Get fill prices
-        buy_record = next((r for r in records if r.order.side.value == "BUY"), None)
-        sell_record = next((r for r in records if r.order.side.value == "SELL"), None)
+        buy_record = records.by_side.get(OrderSide.BUY)
+        sell_record = records.by_side.get(OrderSide.SELL)
         
         if not buy_record or not sell_record:
             LOG.error("Failed to place both legs")
             return
             
-        # In paper mode, use actual market prices from data or stream if available
+        # Subscribe immediately so we start receiving ticks for these legs
+        leg_symbols = [buy_record.order.symbol, sell_record.order.symbol]
+        stream_manager.subscribe(leg_symbols, callback=self._on_tick)
+        
+        # In paper mode, use actual market prices from the stream if available
         if self.mode == "PAPER":
-            # Try to get latest prices from stream first for better fidelity
-            # However, during entry, we might not have subscribed yet.
-            # But the order placement logic might have fetched some data.
-            
-            # Subscribe immediately so we start receiving ticks for these legs
-            stream_manager.subscribe([buy_record.order.symbol, sell_record.order.symbol])
-            
-            # Give it a tiny bit of time to get at least one tick? 
-            # Or just use the ticker data from fetcher as fallback
-            buy_ltp = stream_manager.get_latest_ltp(buy_record.order.symbol)
-            sell_ltp = stream_manager.get_latest_ltp(sell_record.order.symbol)
+            slippage = settings.slippage_points
+            buy_ltp, sell_ltp = stream_manager.get_latest_ltps(leg_symbols).tolist()
             
-            # If stream ticks not yet arrived, use a simulated price based on spot
-            if not buy_ltp or not sell_ltp:
-                buy_strike = self.strategy.buy_strike
-                sell_strike = self.strategy.sell_strike
-                buy_ltp = max(10, market_data.spot_price - buy_strike) + 20
-                sell_ltp = max(5, market_data.spot_price - sell_strike) + 10
+            # The legs were only just subscribed, so their first tick has
+            # normally not arrived yet (NaN); fall back to a simulated price
+            if not (buy_ltp > 0 and sell_ltp > 0):
+                buy_ltp, sell_ltp = _simulated_leg_prices(
+                    market_data.spot_price, self.strategy.buy_strike, self.strategy.sell_strike
+                )
             
-            buy_record.fill_price = buy_ltp + settings.slippage_points
-            sell_record.fill_price = sell_ltp - settings.slippage_points
-        else:
-            # LIVE mode: subscribe after placing 
-            stream_manager.subscribe([buy_record.order.symbol, sell_record.order.symbol])
+            buy_record.fill_price = buy_ltp + slippage
+            sell_record.fill_price = sell_ltp - slippage
         
         # Open position
         lot_size = instrument_manager.get_lot_size(market_data.underlying)
@@ -231,6 +352,7 @@ class LiveTrader:
             lot_size=lot_size,
             brokerage=settings.brokerage_per_order * 2
         )
+        self.state_version += 1
         
         LOG.info(f"Entry executed: {self.strategy.buy_strike}CE/{self.strategy.sell_strike}CE")
     
@@ -257,8 +379,8 @@ class LiveTrader:
             exit_short = exit_short + settings.slippage_points
         else:
             # In live, we'd ideally get fill prices from order records
-            sell_record = next((r for r in records if r.order.symbol == position.long_symbol), None)
-            buy_record = next((r for r in records if r.order.symbol == position.short_symbol), None)
+            sell_record = records.by_symbol.get(position.long_symbol)
+            buy_record = records.by_symbol.get(position.short_symbol)
             exit_long = sell_record.fill_price if sell_record else position.current_long_price
             exit_short = buy_record.fill_price if buy_record else position.current_short_price
         
@@ -269,6 +391,7 @@ class LiveTrader:
             exit_short=exit_short,
             brokerage=settings.brokerage_per_order * 2
         )
+        self.state_version += 1
         
         # Unsubscribe from these symbols
         stream_manager.unsubscribe([position.long_symbol, position.short_symbol])
@@ -286,6 +409,7 @@ class LiveTrader:
                     exit_short=position.short_price,
                     brokerage=settings.brokerage_per_order * 2
                 )
+                self.state_version += 1
                 LOG.info(f"Force closed {position.spread_id}")
             except Exception as e:
                 LOG.error(f"Failed to force close {position.spread_id}: {e}")
@@ -1,12 +1,14 @@
-from .order_manager import OrderManager, OrderRecord, OrderStatus, order_manager
-from .position_manager import PositionManager, SpreadPosition, position_manager
+from .order_manager import OrderBatch, OrderManager, OrderRecord, OrderStatus, order_manager
+from .position_manager import PositionManager, PositionSnapshot, SpreadPosition, position_manager
 
 __all__ = [
+    "OrderBatch",
     "OrderManager",
     "OrderRecord",
     "OrderStatus",
     "order_manager",
     "PositionManager",
+    "PositionSnapshot",
     "SpreadPosition",
     "position_manager",
 ]
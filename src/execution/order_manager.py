@@ -4,7 +4,7 @@ Handles order placement, tracking, and execution.
 """
 
 import logging
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterator, List, Optional
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
@@ -27,7 +27,7 @@ class OrderStatus(Enum):
     SIMULATED = "SIMULATED"
 
 
-@dataclass
+@dataclass(slots=True)
 class OrderRecord:
     """Record of an order with its status and fill details."""
     order: Order
@@ -40,6 +40,26 @@ class OrderRecord:
     rejection_reason: Optional[str] = None
 
 
+@dataclass
+class OrderBatch:
+    """Records from one place_orders call, indexed by side and by symbol."""
+    records: List[OrderRecord]
+    by_side: Dict[OrderSide, OrderRecord] = field(default_factory=dict)
+    by_symbol: Dict[str, OrderRecord] = field(default_factory=dict)
+    
+    def __post_init__(self):
+        # First record wins, as with a front-to-back scan
+        for record in self.records:
+            self.by_side.setdefault(record.order.side, record)
+            self.by_symbol.setdefault(record.order.symbol, record)
+    
+    def __iter__(self) -> Iterator[OrderRecord]:
+        return iter(self.records)
+    
+    def __len__(self) -> int:
+        return len(self.records)
+
+
 class OrderManager:
     """Manages order placement and tracking."""
     
@@ -104,9 +124,9 @@ class OrderManager:
         self,
         orders: List[Order],
         slippage: float = 0.0
-    ) -> List[OrderRecord]:
+    ) -> OrderBatch:
         """Place multiple orders."""
-        return [self.place_order(order, slippage) for order in orders]
+        return OrderBatch([self.place_order(order, slippage) for order in orders])
     
     def get_order_status(self, order_id: str) -> Optional[OrderRecord]:
         """Get order record by ID."""
@@ -4,7 +4,8 @@ Tracks open positions and calculates P&L.
 """
 
 import logging
-from typing import Dict, List, Optional
+import threading
+from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass, field
 from datetime import datetime
 
@@ -14,7 +15,7 @@ from ..config import settings
 LOG = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class SpreadPosition:
     """Represents a spread position with multiple legs."""
     spread_id: str
@@ -125,6 +126,15 @@ class SpreadPosition:
         }
 
 
+@dataclass(frozen=True)
+class PositionSnapshot:
+    """Point-in-time view of the book for UI rendering."""
+    positions: Tuple[SpreadPosition, ...]
+    total_mtm: float
+    realized_pnl: float
+    version: int
+
+
 class PositionManager:
     """Manages trading positions."""
     
@@ -132,6 +142,15 @@ class PositionManager:
         self._positions: Dict[str, SpreadPosition] = {}
         self._closed_positions: List[SpreadPosition] = []
         self._position_counter = 0
+        self._realized_pnl = 0.0
+        # Running win/loss counts so get_stats never rescans closed positions
+        self._winning_trades = 0
+        self._losing_trades = 0
+        # Incremented on every open/close so readers can detect changes cheaply
+        self._version = 0
+        # Immutable view of the open positions, rebuilt lazily after open/close
+        self._open_view: Optional[Tuple[SpreadPosition, ...]] = None
+        self._lock = threading.Lock()
     
     def open_spread(
         self,
@@ -162,8 +181,9 @@ class PositionManager:
         Returns:
             New SpreadPosition
         """
-        self._position_counter += 1
-        spread_id = f"SPREAD_{self._position_counter}"
+        with self._lock:
+            self._position_counter += 1
+            spread_id = f"SPREAD_{self._position_counter}"
         
         position = SpreadPosition(
             spread_id=spread_id,
@@ -179,7 +199,10 @@ class PositionManager:
             brokerage=brokerage
         )
         
-        self._positions[spread_id] = position
+        with self._lock:
+            self._positions[spread_id] = position
+            self._open_view = None
+            self._version += 1
         LOG.info(f"Opened spread {spread_id}: {long_symbol}/{short_symbol} @ {long_price:.2f}/{short_price:.2f}")
         
         return position
@@ -203,22 +226,38 @@ class PositionManager:
         Returns:
             Realized P&L or None if not found
         """
-        position = self._positions.get(spread_id)
-        if not position:
-            LOG.warning(f"Spread {spread_id} not found")
-            return None
-        
-        pnl = position.close(exit_long, exit_short, brokerage)
-        
-        del self._positions[spread_id]
-        self._closed_positions.append(position)
+        with self._lock:
+            # Claim the position first so concurrent closers can't both close it
+            position = self._positions.pop(spread_id, None)
+            if not position:
+                LOG.warning(f"Spread {spread_id} not found")
+                return None
+            
+            pnl = position.close(exit_long, exit_short, brokerage)
+            self._closed_positions.append(position)
+            self._realized_pnl += pnl
+            if pnl > 0:
+                self._winning_trades += 1
+            elif pnl < 0:
+                self._losing_trades += 1
+            self._open_view = None
+            self._version += 1
         
         LOG.info(f"Closed spread {spread_id}: P&L = {pnl:.2f}")
         return pnl
     
-    def get_open_positions(self) -> List[SpreadPosition]:
-        """Get all open positions."""
-        return list(self._positions.values())
+    def get_open_positions(self) -> Tuple[SpreadPosition, ...]:
+        """
+        Get all open positions.
+        
+        Returns:
+            Tuple shared between calls until the next open/close (do not mutate)
+        """
+        view = self._open_view
+        if view is None:
+            with self._lock:
+                view = self._open_view = tuple(self._positions.values())
+        return view
     
     def get_closed_positions(self) -> List[SpreadPosition]:
         """Get all closed positions."""
@@ -230,7 +269,25 @@ class PositionManager:
     
     def get_total_realized_pnl(self) -> float:
         """Get total realized P&L from closed positions."""
-        return sum(p.realized_pnl for p in self._closed_positions)
+        return self._realized_pnl
+    
+    def snapshot(self) -> PositionSnapshot:
+        """
+        Get open positions, MTM and realized P&L in one consistent read.
+        
+        Returns:
+            PositionSnapshot taken under a single lock acquisition
+        """
+        with self._lock:
+            positions = self._open_view
+            if positions is None:
+                positions = self._open_view = tuple(self._positions.values())
+            return PositionSnapshot(
+                positions=positions,
+                total_mtm=sum(p.mtm for p in positions),
+                realized_pnl=self._realized_pnl,
+                version=self._version
+            )
     
     def get_total_exposure(self) -> float:
         """Get total capital at risk in open positions."""
@@ -242,8 +299,13 @@ class PositionManager:
     
     def get_stats(self) -> Dict:
         """Get position statistics."""
-        closed = self._closed_positions
-        if not closed:
+        with self._lock:
+            total_trades = len(self._closed_positions)
+            winning_trades = self._winning_trades
+            losing_trades = self._losing_trades
+            total_pnl = self._realized_pnl
+        
+        if not total_trades:
             return {
                 "total_trades": 0,
                 "winning_trades": 0,
@@ -253,23 +315,25 @@ class PositionManager:
                 "avg_pnl": 0.0
             }
         
-        winners = [p for p in closed if p.realized_pnl > 0]
-        losers = [p for p in closed if p.realized_pnl < 0]
-        total_pnl = sum(p.realized_pnl for p in closed)
-        
         return {
-            "total_trades": len(closed),
-            "winning_trades": len(winners),
-            "losing_trades": len(losers),
-            "win_rate": len(winners) / len(closed) if closed else 0.0,
+            "total_trades": total_trades,
+            "winning_trades": winning_trades,
+            "losing_trades": losing_trades,
+            "win_rate": winning_trades / total_trades,
             "total_pnl": total_pnl,
-            "avg_pnl": total_pnl / len(closed) if closed else 0.0
+            "avg_pnl": total_pnl / total_trades
         }
     
     def clear(self) -> None:
         """Clear all positions."""
-        self._positions.clear()
-        self._closed_positions.clear()
+        with self._lock:
+            self._positions.clear()
+            self._closed_positions.clear()
+            self._realized_pnl = 0.0
+            self._winning_trades = 0
+            self._losing_trades = 0
+            self._open_view = None
+            self._version += 1
 
 
 # Global instance
@@ -70,7 +70,7 @@ class Position:
         return self.side == OrderSide.SELL
 
 
-@dataclass
+@dataclass(slots=True)
 class MarketData:
     """Market data snapshot for strategy decision-making."""
     underlying: str
@@ -91,6 +91,9 @@ class BaseStrategy(ABC):
     All strategies must implement these methods.
     """
     
+    # Subclasses that also declare __slots__ get instances without a __dict__
+    __slots__ = ("name", "positions")
+    
     def __init__(self, name: str):
         self.name = name
         self.positions: List[Position] = []
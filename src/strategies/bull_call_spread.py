@@ -28,6 +28,13 @@ class BullCallSpreadStrategy(BaseStrategy):
     - Risk: Limited to net debit
     """
     
+    __slots__ = (
+        "spread_width", "entry_time", "exit_time", "capital", "risk_pct",
+        "_entry_hour", "_entry_min", "_exit_hour", "_exit_min",
+        "_entered_today", "_current_date",
+        "buy_symbol", "sell_symbol", "buy_strike", "sell_strike", "lot_size",
+    )
+    
     def __init__(
         self,
         spread_width: int = None,
@@ -0,0 +1,23 @@
+import importlib
+
+# Re-exported lazily (PEP 562) so `import src.ui` does not pull in plotly
+_COMPONENTS = (
+    "setup_page",
+    "render_sidebar",
+    "render_metric_card",
+    "plot_equity_curve",
+    "plot_pnl_distribution",
+    "market_open_cached",
+    "next_market_open_cached",
+    "execution_mode_label",
+)
+
+__all__ = list(_COMPONENTS)
+
+
+def __getattr__(name: str):
+    if name not in _COMPONENTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(".components", __name__), name)
+    globals()[name] = value
+    return value
@@ -1,11 +1,39 @@
+import time
 import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
-from typing import List, Optional
+from datetime import datetime
+from functools import lru_cache
+from typing import List, Optional, Tuple
 
-def apply_custom_style():
-    """Inject custom CSS for a premium look."""
-    st.markdown("""
+from src.config import settings
+from src.utils import is_market_open, get_next_market_open
+
+
+@lru_cache(maxsize=2)
+def _market_status(epoch_second: int) -> Tuple[bool, datetime]:
+    """Market open flag and next open time for one wall-clock second."""
+    now = datetime.fromtimestamp(epoch_second)
+    return is_market_open(now), get_next_market_open(now)
+
+
+def market_open_cached() -> bool:
+    """Market open check, computed at most once per second across all sessions."""
+    return _market_status(int(time.time()))[0]
+
+
+def next_market_open_cached() -> datetime:
+    """Next market open time, computed at most once per second across all sessions."""
+    return _market_status(int(time.time()))[1]
+
+
+@lru_cache(maxsize=None)
+def execution_mode_label() -> str:
+    """Execution-mode badge text; settings are fixed for the life of the process."""
+    return f"**Execution Mode**\n\n{settings.mode.upper()} 🛠️"
+
+
+_CUSTOM_CSS = """
         <style>
         @import url('https://fonts.googleapis.com/css2?family=Inter:wght@400;600;700&display=swap');
         
@@ -104,7 +132,26 @@ def apply_custom_style():
            Material Icons and Phosphor icons render correctly.
         */
         </style>
-    """, unsafe_allow_html=True)
+    """
+
+_PAGE_HEADER_TEMPLATE = """
+        <div style='display: flex; align-items: center; gap: 1rem; margin-bottom: 2rem;'>
+            <span style='font-size: 2.5rem;'>{icon}</span>
+            <h1 style='margin: 0; font-family: "Inter", sans-serif; background: linear-gradient(90deg, #ffffff 0%, #94a3b8 100%); -webkit-background-clip: text; -webkit-text-fill-color: transparent; display: inline-block;'>
+                {title}
+            </h1>
+        </div>
+    """
+
+
+def apply_custom_style():
+    """
+    Inject custom CSS for a premium look.
+    
+    Must run on every rerun: Streamlit drops elements a rerun does not re-emit.
+    The stylesheet itself is a module constant, so nothing is rebuilt per call.
+    """
+    st.markdown(_CUSTOM_CSS, unsafe_allow_html=True)
 
 def setup_page(title: str, icon: str = "📈"):
     """
@@ -119,14 +166,7 @@ def setup_page(title: str, icon: str = "📈"):
     apply_custom_style()
     
     # Custom Header with Gradient Text
-    st.markdown(f"""
-        <div style='display: flex; align-items: center; gap: 1rem; margin-bottom: 2rem;'>
-            <span style='font-size: 2.5rem;'>{icon}</span>
-            <h1 style='margin: 0; font-family: "Inter", sans-serif; background: linear-gradient(90deg, #ffffff 0%, #94a3b8 100%); -webkit-background-clip: text; -webkit-text-fill-color: transparent; display: inline-block;'>
-                {title}
-            </h1>
-        </div>
-    """, unsafe_allow_html=True)
+    st.markdown(_PAGE_HEADER_TEMPLATE.format(icon=icon, title=title), unsafe_allow_html=True)
 
 def render_metric_card(label: str, value: str, delta: Optional[str] = None):
     """Render a styled metric card."""
@@ -1,7 +1,9 @@
-from .logger import setup_logger, LOG
+from .logger import setup_logger, LOG, RingBufferHandler, CachedTimeFormatter
+from .cache import TTLLRUCache
 from .helpers import (
     round_to_strike,
     find_atm_strike,
+    find_atm_strike_sorted,
     compute_max_contracts,
     parse_time,
     is_market_open,
@@ -15,8 +17,12 @@ from .helpers import (
 __all__ = [
     "setup_logger",
     "LOG",
+    "RingBufferHandler",
+    "CachedTimeFormatter",
+    "TTLLRUCache",
     "round_to_strike",
     "find_atm_strike",
+    "find_atm_strike_sorted",
     "compute_max_contracts",
     "parse_time",
     "is_market_open",
@@ -3,9 +3,13 @@ Common utility functions for the trading bot.
 """
 
 import math
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, time
 from typing import List, Tuple, Optional
 
+import numpy as np
+
+MARKET_OPEN_TIME = time(9, 15)
+
 
 def round_to_strike(price: float, step: int = 50) -> int:
     """
@@ -37,6 +41,27 @@ def find_atm_strike(spot_price: float, strikes: List[float]) -> float:
     return min(strikes, key=lambda s: abs(s - spot_price))
 
 
+def find_atm_strike_sorted(spot_price: float, strikes: np.ndarray) -> float:
+    """
+    Find the at-the-money strike in an ascending strike array (binary search).
+    
+    Args:
+        spot_price: Current spot price
+        strikes: Strikes sorted ascending
+        
+    Returns:
+        ATM strike price (the lower strike when two are equally near)
+    """
+    if len(strikes) == 0:
+        raise ValueError("No strikes provided")
+    idx = int(np.searchsorted(strikes, spot_price))
+    if idx == len(strikes):
+        return float(strikes[-1])
+    if idx > 0 and spot_price - strikes[idx - 1] <= strikes[idx] - spot_price:
+        return float(strikes[idx - 1])
+    return float(strikes[idx])
+
+
 def compute_max_contracts(
     capital: float,
     risk_pct: float,
@@ -124,7 +149,7 @@ def get_next_market_open(current_time: Optional[datetime] = None) -> datetime:
     next_open = current_time.replace(hour=9, minute=15, second=0, microsecond=0)
     
     # If past today's opening, move to next day
-    if current_time.time() >= datetime.strptime("09:15", "%H:%M").time():
+    if current_time.time() >= MARKET_OPEN_TIME:
         next_open += timedelta(days=1)
     
     # Skip weekends
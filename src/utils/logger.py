@@ -4,10 +4,36 @@ Centralized logging configuration for the trading bot.
 
 import logging
 import sys
+import time
+from collections import deque
 from pathlib import Path
 from datetime import datetime
 
 
+class CachedTimeFormatter(logging.Formatter):
+    """
+    Formatter that renders each second's timestamp once.
+    
+    The stock formatter calls time.strftime for every record; here the
+    seconds part is cached and only the milliseconds are filled in per record.
+    """
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # (epoch second, formatted text) swapped as one tuple so threads never see a mix
+        self._cached_time = (None, "")
+    
+    def formatTime(self, record: logging.LogRecord, datefmt=None) -> str:
+        second = int(record.created)
+        cached_second, text = self._cached_time
+        if second != cached_second:
+            text = time.strftime(datefmt or self.default_time_format, self.converter(second))
+            self._cached_time = (second, text)
+        if datefmt or not self.default_msec_format:
+            return text
+        return self.default_msec_format % (text, record.msecs)
+
+
 def setup_logger(
     name: str = "trading_bot",
     level: int = logging.INFO,
@@ -39,13 +65,13 @@ def setup_logger(
     logger.handlers.clear()
     
     # Detailed formatter with more context
-    detailed_formatter = logging.Formatter(
+    detailed_formatter = CachedTimeFormatter(
         "%(asctime)s | %(levelname)-8s | %(name)s:%(funcName)s:%(lineno)d | %(message)s",
         datefmt="%Y-%m-%d %H:%M:%S"
     )
     
     # Simple formatter for console
-    simple_formatter = logging.Formatter(
+    simple_formatter = CachedTimeFormatter(
         "%(asctime)s | %(levelname)-8s | %(message)s",
         datefmt="%H:%M:%S"
     )
@@ -88,6 +114,46 @@ def setup_logger(
     return logger
 
 
+class RingBufferHandler(logging.Handler):
+    """
+    Logging handler that keeps only the most recent formatted records.
+    
+    Appends are O(1) and memory is capped at `capacity` lines, so UI log
+    panels can render the tail without copying the whole session's output.
+    The joined text is cached and rebuilt only after new records arrive.
+    """
+    
+    def __init__(self, capacity: int = 200, level: int = logging.NOTSET):
+        super().__init__(level)
+        self.buf: deque = deque(maxlen=capacity)
+        # Bumped on every emit/clear so readers can tell when the text changed
+        self.version = 0
+        self._text = ""
+        self._text_version = 0
+    
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            self.buf.append(self.format(record))
+            self.version += 1
+        except Exception:
+            self.handleError(record)
+    
+    def get_text(self) -> str:
+        """Return buffered records joined as a single block of text."""
+        if self._text_version != self.version:
+            # Handler lock keeps emits from mutating the deque mid-join
+            with self.lock:
+                self._text = "\n".join(self.buf)
+                self._text_version = self.version
+        return self._text
+    
+    def clear(self) -> None:
+        """Drop all buffered records."""
+        with self.lock:
+            self.buf.clear()
+            self.version += 1
+
+
 # Default logger
 LOG = setup_logger()
 
@@ -0,0 +1,35 @@
+"""
+Shared fixtures for the offline tests.
+"""
+
+import importlib
+import sys
+
+import pytest
+
+
+def import_offline(name: str):
+    """
+    Import a module that pulls in the global Groww client, without the network.
+
+    Building the client logs in. Without credentials configured that login is
+    replaced by a canned token; tests using this never send real requests.
+    """
+    with pytest.MonkeyPatch.context() as mp:
+        if "src.api.groww_client" not in sys.modules:
+            from growwapi import GrowwAPI
+            from src.config.settings import get_settings
+
+            if not get_settings().api_key:
+                mp.setenv("GROWW_API_KEY", "offline")
+                mp.setenv("GROWW_API_SECRET", "JBSWY3DPEHPK3PXP")
+                get_settings.cache_clear()
+                mp.setattr(GrowwAPI, "get_access_token", staticmethod(lambda api_key, totp: "offline"))
+                mp.setattr(GrowwAPI, "_get_changelog", lambda self: {})
+        return importlib.import_module(name)
+
+
+@pytest.fixture(scope="session")
+def offline_import():
+    """The import_offline helper, for module-scoped fixtures."""
+    return import_offline
@@ -0,0 +1,128 @@
+"""
+Test the vectorized, column-wise backtester against scalar reference math (offline).
+"""
+
+import pytest
+
+
+SLIPPAGE = 0.5
+LOT_SIZE = 75
+
+
+class StubFetcher:
+    """Historical fetcher stand-in: a deterministic spot series and no chains."""
+
+    @staticmethod
+    def spot(date: str) -> float:
+        return 24000 + 37.3 * int(date[-2:])
+
+    def get_spot_prices(self, symbol, dates):
+        return {date: self.spot(date) for date in dates}
+
+    def get_option_chains(self, underlying, expiries):
+        return {expiry: {"calls": [], "puts": []} for expiry in expiries}
+
+    def get_option_chain(self, underlying, expiry, *args, **kwargs):
+        return {"calls": [], "puts": []}
+
+
+@pytest.fixture(scope="module")
+def backtester_module(offline_import):
+    """Import the backtester without touching the network."""
+    module = offline_import("src.engine.backtester")
+
+    # Lot sizes come from the instrument list; serve them without a download
+    instruments = module.instrument_manager
+    with pytest.MonkeyPatch.context() as mp:
+        import pandas as pd
+
+        mp.setattr(instruments, "_loaded", True)
+        mp.setattr(instruments, "_instruments_df", pd.DataFrame())
+        mp.setattr(instruments, "_lot_sizes", {"NIFTY": LOT_SIZE})
+        yield module
+
+
+@pytest.fixture(scope="module")
+def result(backtester_module):
+    backtester = backtester_module.Backtester(slippage=SLIPPAGE)
+    backtester._historical = StubFetcher()
+    return backtester.run("NIFTY", "2025-01-01", "2025-02-20")
+
+
+def _reference_fills(spot, buy_strike, sell_strike, days_to_exp):
+    """Per-trade scalar pricing, as the engine computed it before vectorizing."""
+    buy_intrinsic = max(0, spot - buy_strike)
+    sell_intrinsic = max(0, spot - sell_strike)
+    time_value_factor = max(0.01, days_to_exp / 30.0) * 0.02
+    time_value_buy = max(10, abs(spot - buy_strike) * time_value_factor)
+    time_value_sell = max(5, abs(spot - sell_strike) * time_value_factor * 0.5)
+    buy_price = buy_intrinsic + time_value_buy
+    sell_price = sell_intrinsic + time_value_sell
+    return {
+        "entry_buy": buy_price + SLIPPAGE,
+        "entry_sell": sell_price - SLIPPAGE,
+        "exit_buy": buy_price * 0.95,
+        "exit_sell": sell_price * 0.95,
+    }
+
+
+def test_trades_generated(result):
+    """Every business day in range trades against the stub data."""
+    import pandas as pd
+
+    business_days = len(pd.bdate_range("2025-01-01", "2025-02-20"))
+    assert result.total_trades == len(result.trades) == business_days
+
+
+def test_fills_match_scalar_reference(result):
+    """Vectorized fills are bit-identical to the scalar formulas."""
+    for trade in result.trades:
+        expected = _reference_fills(
+            trade["spot_price"], trade["buy_strike"], trade["sell_strike"], trade["days_to_expiry"]
+        )
+        for name, value in expected.items():
+            assert trade[name] == value, (trade["date"], name)
+        assert trade["spot_price"] == StubFetcher.spot(trade["date"])
+        assert trade["lot_size"] == LOT_SIZE
+
+
+def test_stats_match_running_totals(result):
+    """Array statistics agree with a plain running-sum pass over the trades."""
+    total = 0.0
+    peak = 0.0
+    max_drawdown = 0.0
+    for trade in result.trades:
+        total += trade["pnl_after_brokerage"]
+        peak = max(peak, total)
+        max_drawdown = max(max_drawdown, peak - total)
+
+    pnls = [t["pnl_after_brokerage"] for t in result.trades]
+    assert result.total_pnl == total
+    assert result.max_drawdown == max_drawdown
+    assert result.winning_trades == sum(p > 0 for p in pnls)
+    assert result.losing_trades == sum(p < 0 for p in pnls)
+
+
+def test_column_views_agree(result, backtester_module):
+    """trades, iter_trade_rows and to_dataframe expose the same records."""
+    trades = result.trades
+    rows = list(result.iter_trade_rows())
+    frame = result.to_dataframe()
+
+    assert list(frame.columns) == list(backtester_module.TRADE_COLUMNS)
+    assert frame.to_dict("records") == trades
+    assert [tuple(t.values()) for t in trades] == rows
+    assert result.column("date") == [t["date"] for t in trades]
+
+
+def test_malformed_entry_is_dropped(backtester_module):
+    """One unpriceable entry is skipped instead of aborting pass 2."""
+    backtester = backtester_module.Backtester(slippage=SLIPPAGE)
+    good = {"date": "2025-01-01", "spot_price": 24000.0, "buy_strike": 24000,
+            "sell_strike": 24300, "days_to_expiry": 1}
+    bad = dict(good, date="2025-01-02", spot_price=None)
+
+    priced = backtester._price_entries([good, bad, good])
+
+    assert [entry["date"] for entry, _ in priced] == ["2025-01-01", "2025-01-01"]
+    assert priced[0][1]["entry_buy"] == _reference_fills(24000.0, 24000, 24300, 1)["entry_buy"]
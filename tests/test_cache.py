@@ -0,0 +1,111 @@
+"""
+Test the bounded TTL/LRU cache (offline).
+"""
+
+import pytest
+
+from src.utils import cache as cache_module
+from src.utils.cache import TTLLRUCache
+
+
+class FakeClock:
+    """Stand-in for time.monotonic that only moves when told to."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(cache_module.time, "monotonic", fake)
+    return fake
+
+
+def test_rejects_non_positive_maxsize():
+    """A cache must be able to hold at least one entry."""
+    with pytest.raises(ValueError):
+        TTLLRUCache(maxsize=0)
+
+
+def test_get_and_default():
+    """Stored values come back; missing keys return the default."""
+    cache = TTLLRUCache(maxsize=2)
+    cache.set("a", 1)
+
+    assert cache.get("a") == 1
+    assert cache.get("missing") is None
+    assert cache.get("missing", "fallback") == "fallback"
+
+
+def test_evicts_least_recently_used():
+    """A get() refreshes recency, so the untouched entry is evicted first."""
+    cache = TTLLRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_overwrite_does_not_grow():
+    """Re-setting a key replaces its value in place."""
+    cache = TTLLRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("a", 2)
+
+    assert len(cache) == 1
+    assert cache.get("a") == 2
+
+
+def test_default_ttl_expires(clock):
+    """Entries vanish once the cache-wide ttl has elapsed."""
+    cache = TTLLRUCache(maxsize=4, ttl=10)
+    cache.set("a", 1)
+
+    clock.now += 9.9
+    assert cache.get("a") == 1
+
+    clock.now += 0.1
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_per_entry_ttl_overrides_default(clock):
+    """A ttl passed to set() wins over the cache default."""
+    cache = TTLLRUCache(maxsize=4, ttl=10)
+    cache.set("short", 1, ttl=1)
+    cache.set("long", 2, ttl=100)
+
+    clock.now += 5
+    assert cache.get("short") is None
+
+    clock.now += 50
+    assert cache.get("long") == 2
+
+
+def test_no_ttl_never_expires(clock):
+    """Without any ttl entries live until evicted."""
+    cache = TTLLRUCache(maxsize=4)
+    cache.set("a", 1)
+
+    clock.now += 10 ** 9
+    assert cache.get("a") == 1
+
+
+def test_clear():
+    """clear() drops every entry."""
+    cache = TTLLRUCache(maxsize=4)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.clear()
+
+    assert len(cache) == 0
+    assert cache.get("a") is None
@@ -3,11 +3,6 @@ Test data fetching functionality.
 """
 
 import pytest
-import sys
-from pathlib import Path
-
-# Add src to path
-sys.path.insert(0, str(Path(__file__).parent.parent))
 
 
 def test_historical_fetcher_init():
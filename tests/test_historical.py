@@ -0,0 +1,145 @@
+"""
+Test single-flight sharing of concurrent candle fetches (offline).
+"""
+
+import threading
+
+import pytest
+
+
+SYMBOL = "NSE-NIFTY"
+# A range entirely in the past (the long-lived cache tier)
+START, END = "2025-01-06", "2025-01-06"
+CANDLES = [
+    ["2025-01-06T09:15:00", 100.0, 101.0, 99.0, 100.5, 1000],
+    ["2025-01-06T09:20:00", 100.5, 102.0, 100.0, 101.5, 1200],
+]
+
+
+class BlockingClient:
+    """get_historical_candles blocks until released, then answers or raises."""
+
+    def __init__(self, error=None):
+        self.calls = 0
+        self.entered = threading.Event()
+        self.release = threading.Event()
+        self.error = error
+
+    def get_historical_candles(self, **kwargs):
+        self.calls += 1
+        self.entered.set()
+        self.release.wait(5)
+        if self.error is not None:
+            raise self.error
+        return {"candles": CANDLES}
+
+
+@pytest.fixture(scope="module")
+def historical_module(offline_import):
+    return offline_import("src.data.historical")
+
+
+@pytest.fixture
+def fetcher(historical_module, tmp_path):
+    return historical_module.HistoricalDataFetcher(cache_dir=str(tmp_path))
+
+
+def _fetch_concurrently(fetcher, stub, followers=3):
+    """Start a leader, wait until it is upstream, add followers, then release it."""
+    results = {}
+
+    def call(name):
+        try:
+            results[name] = fetcher.get_candles(SYMBOL, START, END)
+        except Exception as e:
+            results[name] = e
+
+    leader = threading.Thread(target=call, args=("leader",))
+    leader.start()
+    assert stub.entered.wait(5)
+
+    # Count followers as they park on the leader's future
+    flight = next(iter(fetcher._inflight.values()))
+    parked = threading.Semaphore(0)
+    wait_for_leader = flight.result
+
+    def result(timeout=None):
+        parked.release()
+        return wait_for_leader(timeout)
+
+    flight.result = result
+
+    threads = [threading.Thread(target=call, args=(f"follower{i}",)) for i in range(followers)]
+    for thread in threads:
+        thread.start()
+    for _ in threads:
+        assert parked.acquire(timeout=5)
+    stub.release.set()
+    for thread in [leader, *threads]:
+        thread.join(5)
+    return results
+
+
+def test_followers_share_the_leaders_frame(fetcher):
+    """One upstream call; every caller gets the very same frame."""
+    stub = BlockingClient()
+    fetcher._client = stub
+
+    results = _fetch_concurrently(fetcher, stub)
+
+    assert stub.calls == 1
+    frames = list(results.values())
+    assert len(frames) == 4
+    assert all(frame is frames[0] for frame in frames)
+    assert list(frames[0]["close"]) == [100.5, 101.5]
+    assert fetcher._inflight == {}
+
+
+def test_failed_fetch_reaches_followers(fetcher):
+    """An upstream error is not retried by followers; all get the empty result."""
+    stub = BlockingClient(error=ConnectionError("down"))
+    fetcher._client = stub
+
+    results = _fetch_concurrently(fetcher, stub)
+
+    assert stub.calls == 1
+    assert len(results) == 4
+    assert all(frame.empty for frame in results.values())
+
+
+def test_leader_exception_is_raised_in_followers(historical_module, fetcher, monkeypatch):
+    """Anything escaping the leader's load is re-raised in every follower."""
+    stub = BlockingClient()
+    fetcher._client = stub
+    original = historical_module.HistoricalDataFetcher._load_candles
+
+    def exploding_load(self, *args):
+        original(self, *args)
+        raise RuntimeError("corrupt frame")
+
+    monkeypatch.setattr(historical_module.HistoricalDataFetcher, "_load_candles", exploding_load)
+
+    results = _fetch_concurrently(fetcher, stub)
+
+    assert stub.calls == 1
+    assert len(results) == 4
+    assert all(isinstance(r, RuntimeError) for r in results.values())
+
+
+def test_follower_timeout_fetches_directly(historical_module, fetcher, monkeypatch):
+    """A follower that gives up waiting loads the range itself instead of returning nothing."""
+    monkeypatch.setattr(historical_module.HistoricalDataFetcher, "INFLIGHT_TIMEOUT", 0.05)
+    stub = BlockingClient()
+    fetcher._client = stub
+
+    leader = threading.Thread(target=fetcher.get_candles, args=(SYMBOL, START, END))
+    leader.start()
+    assert stub.entered.wait(5)
+
+    # The leader stays blocked; the follower's own call is released by a timer
+    threading.Timer(0.5, stub.release.set).start()
+    frame = fetcher.get_candles(SYMBOL, START, END)
+    leader.join(5)
+
+    assert stub.calls == 2
+    assert list(frame["close"]) == [100.5, 101.5]
@@ -0,0 +1,45 @@
+"""
+Test log formatting helpers (offline).
+"""
+
+import logging
+
+import pytest
+
+from src.utils.logger import CachedTimeFormatter
+
+
+FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+
+
+def _record(created: float) -> logging.LogRecord:
+    record = logging.LogRecord("test", logging.INFO, __file__, 1, "hello", None, None)
+    record.created = created
+    record.msecs = (created - int(created)) * 1000
+    return record
+
+
+@pytest.mark.parametrize("datefmt", [None, "%H:%M:%S", "%Y-%m-%d %H:%M"])
+def test_matches_stock_formatter(datefmt):
+    """Cached timestamps render exactly like logging.Formatter's."""
+    cached = CachedTimeFormatter(FORMAT, datefmt=datefmt)
+    stock = logging.Formatter(FORMAT, datefmt=datefmt)
+
+    # Several records per second, then a jump to later seconds
+    for created in (1_700_000_000.001, 1_700_000_000.5, 1_700_000_000.999,
+                    1_700_000_001.0, 1_700_003_600.25):
+        record = _record(created)
+        assert cached.format(record) == stock.format(record)
+
+
+def test_refreshes_when_the_second_changes():
+    """The cached text is reused within a second and replaced after it."""
+    formatter = CachedTimeFormatter(FORMAT)
+
+    first = formatter.formatTime(_record(1_700_000_000.25))
+    same_second = formatter.formatTime(_record(1_700_000_000.75))
+    next_second = formatter.formatTime(_record(1_700_000_001.25))
+
+    assert first[:-4] == same_second[:-4]
+    assert first.endswith(",250") and same_second.endswith(",750")
+    assert next_second[:-4] != first[:-4]
@@ -0,0 +1,100 @@
+"""
+Test the cross-thread LTP request batcher against a stub client (offline).
+"""
+
+import threading
+
+import pytest
+
+
+class StubClient:
+    """Answers get_ltp from a price table and records every call."""
+
+    def __init__(self, error=None):
+        self.calls = []
+        self.error = error
+
+    def get_ltp(self, symbols, segment):
+        names = symbols.split(",")
+        self.calls.append((segment, names))
+        if self.error is not None:
+            raise self.error
+        return {name: float(len(name)) for name in names}
+
+
+@pytest.fixture(scope="module")
+def batcher_module(offline_import):
+    return offline_import("src.api.ltp_batcher")
+
+
+def _request_together(batcher, requests):
+    """Issue (symbol, segment) requests from one thread each, all at once."""
+    barrier = threading.Barrier(len(requests))
+    futures = [None] * len(requests)
+
+    def worker(i, symbol, segment):
+        barrier.wait()
+        futures[i] = batcher.request(symbol, segment)
+
+    threads = [threading.Thread(target=worker, args=(i, *req)) for i, req in enumerate(requests)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return futures
+
+
+def test_concurrent_requests_share_one_call_per_segment(batcher_module):
+    """Requests landing in one window become one get_ltp per segment."""
+    stub = StubClient()
+    batcher = batcher_module.LTPBatcher(stub, flush_ms=200)
+
+    futures = _request_together(batcher, [
+        ("NSE_A", "CASH"), ("NSE_BB", "CASH"), ("NSE_A", "CASH"), ("NSE_OPT", "FNO"),
+    ])
+    results = [f.result(timeout=5) for f in futures]
+
+    assert results == [5.0, 6.0, 5.0, 7.0]
+    assert sorted((seg, sorted(names)) for seg, names in stub.calls) == [
+        ("CASH", ["NSE_A", "NSE_BB"]), ("FNO", ["NSE_OPT"]),
+    ]
+
+
+def test_large_batches_are_chunked(batcher_module):
+    """More than MAX_SYMBOLS symbols are split across calls."""
+    stub = StubClient()
+    batcher = batcher_module.LTPBatcher(stub, flush_ms=200)
+    symbols = [f"NSE_S{i}" for i in range(batcher.MAX_SYMBOLS + 7)]
+
+    futures = [batcher.request(symbol) for symbol in symbols]
+    results = [f.result(timeout=5) for f in futures]
+
+    assert results == [float(len(s)) for s in symbols]
+    assert [len(names) for _, names in stub.calls] == [batcher.MAX_SYMBOLS, 7]
+    assert [n for _, names in stub.calls for n in names] == symbols
+
+
+def test_client_error_reaches_every_waiter(batcher_module):
+    """A failed call raises in every caller waiting on that batch."""
+    stub = StubClient(error=ConnectionError("down"))
+    batcher = batcher_module.LTPBatcher(stub, flush_ms=200)
+
+    futures = _request_together(batcher, [("NSE_A", "CASH"), ("NSE_A", "CASH"), ("NSE_B", "CASH")])
+
+    for future in futures:
+        with pytest.raises(ConnectionError):
+            future.result(timeout=5)
+    assert len(stub.calls) == 1
+
+
+def test_dead_worker_is_restarted(batcher_module):
+    """A request after the worker thread died still gets served."""
+    stub = StubClient()
+    batcher = batcher_module.LTPBatcher(stub, flush_ms=10)
+    dead = threading.Thread(target=lambda: None)
+    dead.start()
+    dead.join()
+    batcher._thread = dead
+
+    assert batcher.request("NSE_A").result(timeout=5) == 5.0
+    assert batcher._thread is not dead
@@ -0,0 +1,86 @@
+"""
+Test the client-side token bucket (offline).
+"""
+
+import pytest
+
+from src.api import rate_limiter
+from src.api.rate_limiter import TokenBucket
+
+
+class FakeTime:
+    """Monotonic clock whose sleep() just advances it."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+        self.advance_on_sleep = True
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.slept.append(seconds)
+        if self.advance_on_sleep:
+            self.now += seconds
+
+
+@pytest.fixture
+def fake_time(monkeypatch):
+    fake = FakeTime()
+    monkeypatch.setattr(rate_limiter.time, "monotonic", fake.monotonic)
+    monkeypatch.setattr(rate_limiter.time, "sleep", fake.sleep)
+    return fake
+
+
+def test_rejects_non_positive_rate():
+    """A bucket that never refills would block forever."""
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0)
+
+
+def test_burst_up_to_capacity_without_waiting(fake_time):
+    """A full bucket serves `capacity` requests immediately."""
+    bucket = TokenBucket(rate=10)
+
+    waits = [bucket.acquire() for _ in range(10)]
+
+    assert waits == [0.0] * 10
+    assert fake_time.slept == []
+
+
+def test_waits_for_refill_when_empty(fake_time):
+    """Once drained, each request waits one token's worth of time."""
+    bucket = TokenBucket(rate=10)
+    for _ in range(10):
+        bucket.acquire()
+
+    assert bucket.acquire() == pytest.approx(0.1)
+    assert fake_time.slept == [pytest.approx(0.1)]
+
+
+def test_refill_is_capped_at_capacity(fake_time):
+    """Idle time never banks more than one burst."""
+    bucket = TokenBucket(rate=5, capacity=2)
+    bucket.acquire()
+    bucket.acquire()
+
+    fake_time.now += 60
+
+    assert bucket.acquire() == 0.0
+    assert bucket.acquire() == 0.0
+    assert bucket.acquire() == pytest.approx(0.2)
+
+
+def test_waiters_queue_in_order(fake_time):
+    """Callers arriving together on an empty bucket reserve successive slots."""
+    bucket = TokenBucket(rate=4, capacity=1)
+    bucket.acquire()
+
+    # Both reserve before either has slept (the clock does not move)
+    fake_time.advance_on_sleep = False
+    first = bucket.acquire()
+    second = bucket.acquire()
+
+    assert first == pytest.approx(0.25)
+    assert second == pytest.approx(0.5)
@@ -0,0 +1,242 @@
+"""
+Test the stream manager's feed bookkeeping against a fake GrowwFeed (offline).
+"""
+
+import threading
+
+import numpy as np
+import pytest
+
+
+class FakeSocket:
+    def __init__(self):
+        self.is_closed = False
+
+
+class FakeNatsClient:
+    def __init__(self):
+        self._socket = FakeSocket()
+
+
+class FakeFeed:
+    """Records subscribe/unsubscribe calls as lists of symbols."""
+
+    def __init__(self):
+        self._nats_client = FakeNatsClient()
+        self.calls = []
+
+    def subscribe_ltp(self, instruments, on_data_received=None):
+        self.calls.append(("subscribe", [i["symbol"] for i in instruments]))
+
+    def subscribe_index_value(self, instruments, on_data_received=None):
+        self.calls.append(("subscribe", [i["symbol"] for i in instruments]))
+
+    def unsubscribe_ltp(self, instruments):
+        self.calls.append(("unsubscribe", [i["symbol"] for i in instruments]))
+
+    def unsubscribe_index_value(self, instruments):
+        self.calls.append(("unsubscribe", [i["symbol"] for i in instruments]))
+
+
+def _instrument(symbol):
+    return {"symbol": symbol, "exchange": "NSE", "segment": "CASH",
+            "exchange_token": symbol, "is_index": symbol.startswith("NSE_")}
+
+
+@pytest.fixture(scope="module")
+def stream_module(offline_import):
+    return offline_import("src.api.stream")
+
+
+@pytest.fixture
+def manager(stream_module, monkeypatch):
+    """A connected manager with its own state, not the global singleton's."""
+    manager = object.__new__(stream_module.StreamManager)
+    manager._subscriptions = set()
+    manager._instruments = {s: _instrument(s) for s in ("NSE_NIFTY", "A", "B", "C")}
+    manager._feed_keys = {}
+    manager._sym_callbacks = {}
+    manager._pending_sub = set()
+    manager._pending_unsub = set()
+    manager._flush_timer = None
+    manager._idx = {}
+    manager._ltp = np.full(8, np.nan)
+    manager._ts = np.zeros(8, dtype=np.int64)
+    manager._watchdog_stop = threading.Event()
+    manager._reconnect_lock = threading.Lock()
+    manager._feed = FakeFeed()
+    manager._is_connected = True
+    manager.RESUBSCRIBE_DELAY = 0.0
+
+    rebuilt = []
+
+    class RebuiltFeed(FakeFeed):
+        _nats_clients = {}
+
+        def __init__(self, api):
+            super().__init__()
+            rebuilt.append(self)
+
+    monkeypatch.setattr(stream_module, "GrowwFeed", RebuiltFeed)
+    manager.rebuilt = rebuilt
+    return manager
+
+
+def _stall(manager):
+    manager._last_tick_ns -= int((manager.STALL_TIMEOUT + 1) * 1e9)
+
+
+def test_quiet_closed_market_keeps_the_feed(manager, stream_module, monkeypatch):
+    """Silence outside market hours neither rebuilds nor resubscribes."""
+    monkeypatch.setattr(stream_module, "is_market_open", lambda: False)
+    manager._send_subscribe(["NSE_NIFTY"])
+    feed = manager._feed
+    feed.calls.clear()
+
+    for _ in range(3):
+        _stall(manager)
+        manager._check_feed()
+
+    assert manager._feed is feed
+    assert manager.rebuilt == []
+    assert feed.calls == []
+
+
+def test_stall_resubscribes_on_the_same_feed(manager, stream_module, monkeypatch):
+    """A silent feed during market hours is resubscribed, not rebuilt."""
+    monkeypatch.setattr(stream_module, "is_market_open", lambda: True)
+    manager._send_subscribe(["A", "B"])
+    feed = manager._feed
+    feed.calls.clear()
+
+    _stall(manager)
+    manager._check_feed()
+
+    assert manager._feed is feed
+    assert manager.rebuilt == []
+    assert [(kind, sorted(symbols)) for kind, symbols in feed.calls] == [
+        ("unsubscribe", ["A", "B"]), ("subscribe", ["A", "B"])
+    ]
+    assert manager._subscriptions == {"A", "B"}
+
+
+def test_closed_connection_rebuilds_the_feed(manager, stream_module, monkeypatch):
+    """Only a NATS client that gave up reconnecting triggers a new feed."""
+    monkeypatch.setattr(stream_module, "is_market_open", lambda: False)
+    monkeypatch.setattr(manager, "_start_watchdog", lambda: None)
+    manager._send_subscribe(["A"])
+    old = manager._feed
+    old._nats_client._socket.is_closed = True
+
+    manager._check_feed()
+
+    assert len(manager.rebuilt) == 1
+    assert manager._feed is not old
+    assert manager._feed.calls == [("subscribe", ["A"])]
+    assert manager._subscriptions == {"A"}
+
+
+def test_disconnect_forgets_the_session(manager, monkeypatch):
+    """STOP then START subscribes nothing from the previous session."""
+    monkeypatch.setattr(manager, "_start_watchdog", lambda: None)
+    listener = lambda symbol, ltp: None
+    manager.subscribe(["NSE_NIFTY", "A"], callback=listener)
+    manager._flush_subscriptions()
+    feed = manager._feed
+
+    manager.disconnect()
+    feed.calls.clear()
+    manager.connect()
+
+    assert manager._feed is feed and manager.rebuilt == []
+    assert feed.calls == []
+    assert manager._subscriptions == set()
+    assert manager._sym_callbacks == {}
+    assert manager._feed_keys == {}
+
+
+def test_reconnect_restores_subscriptions(manager, monkeypatch):
+    """Only the reconnect path replays what was subscribed before."""
+    monkeypatch.setattr(manager, "_start_watchdog", lambda: None)
+    manager._send_subscribe(["A", "B"])
+    manager._feed._nats_client._socket.is_closed = True
+
+    manager.reconnect()
+
+    assert len(manager.rebuilt) == 1
+    assert [(kind, sorted(symbols)) for kind, symbols in manager._feed.calls] == [
+        ("subscribe", ["A", "B"])
+    ]
+
+
+def test_subscribe_is_sent_at_once(manager):
+    """New symbols reach the feed before subscribe() returns."""
+    manager.subscribe(["A", "B"])
+
+    assert [(kind, sorted(symbols)) for kind, symbols in manager._feed.calls] == [
+        ("subscribe", ["A", "B"])
+    ]
+    assert manager._subscriptions == {"A", "B"}
+    assert manager._flush_timer is None
+
+
+def test_unsubscribes_share_one_timer(manager):
+    """Unsubscribes inside one window arm one timer and go out as one call."""
+    manager.SUBSCRIPTION_DEBOUNCE = 60.0
+    manager.subscribe(["A", "B", "C"])
+    manager._feed.calls.clear()
+
+    manager.unsubscribe(["A"])
+    timer = manager._flush_timer
+    manager.unsubscribe(["B"])
+
+    assert manager._flush_timer is timer
+    assert manager._feed.calls == []
+    timer.cancel()
+    manager._flush_subscriptions()
+    assert [(kind, sorted(symbols)) for kind, symbols in manager._feed.calls] == [
+        ("unsubscribe", ["A", "B"])
+    ]
+    assert manager._subscriptions == {"C"}
+
+
+def test_resubscribe_cancels_pending_unsubscribe(manager):
+    """Subscribing again inside the window leaves the symbol untouched upstream."""
+    manager.SUBSCRIPTION_DEBOUNCE = 60.0
+    manager.subscribe(["A"])
+    manager._feed.calls.clear()
+
+    manager.unsubscribe(["A"])
+    manager.subscribe(["A"])
+    manager._flush_timer.cancel()
+    manager._flush_subscriptions()
+
+    assert manager._feed.calls == []
+    assert manager._subscriptions == {"A"}
+
+
+def test_unsubscribe_drops_unsent_symbol(manager):
+    """A symbol still queued for subscribe is dropped, not unsubscribed."""
+    manager.SUBSCRIPTION_DEBOUNCE = 60.0
+    manager._pending_sub.add("A")
+
+    manager.unsubscribe(["A"])
+
+    assert manager._pending_sub == set()
+    assert manager._pending_unsub == set()
+    assert manager._flush_timer is None
+
+
+def test_subscribe_flush_takes_queued_unsubscribes(manager):
+    """A subscribe sends queued unsubscribes with it and disarms the timer."""
+    manager.SUBSCRIPTION_DEBOUNCE = 60.0
+    manager.subscribe(["A"])
+    manager.unsubscribe(["A"])
+    timer = manager._flush_timer
+    manager._feed.calls.clear()
+
+    manager.subscribe(["B"])
+
+    assert manager._feed.calls == [("unsubscribe", ["A"]), ("subscribe", ["B"])]
+    assert manager._flush_timer is None
+    assert timer.finished.is_set()